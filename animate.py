@@ -1,9 +1,164 @@
 import os
 import os.path as osp
-import cv2
-from shutil import rmtree
+import json
+import subprocess
+import numpy as np
+import matplotlib.pyplot as plt
+from copy import deepcopy
+from hashlib import md5
+from multiprocessing import Pool, Queue as ProcessQueue
+from queue import Queue, Empty, Full
+from shutil import rmtree, which
+from threading import Thread
 
+from avi import can_join_avi, join_avi
+from cache import LRUCache
 from flights import WorldFlights
+from telemetry import STAGES, FRAMES
+
+
+# the extension of the videos made with each codec
+CODECS = {
+    'XVID' : '.avi',
+    'MJPG' : '.avi',
+    'mp4v' : '.mp4',
+}
+
+
+# the codecs encoding each frame on its own, the only ones giving the same video when encoded in chunks
+INTRA_CODECS = ['MJPG']
+
+
+# the file of 'frames_dir' recording the inputs of the frames already made, as JSON lines
+MANIFEST = 'manifest.jsonl'
+
+
+# the animation loaded once by each worker process
+WORKER_ANIMATION = None
+
+
+# the queues through which each worker process sends back its results
+WORKER_QUEUES = None
+
+
+def init_worker(animation, queues=None):
+    '''
+    Stores the animation and the queues of the results in the worker process.
+    '''
+    global WORKER_ANIMATION, WORKER_QUEUES
+    plt.switch_backend('Agg') # the frames are only saved
+    WORKER_ANIMATION = animation
+    WORKER_QUEUES = queues
+
+
+def run_worker_group(task):
+    '''
+    Applies 'function' to each task of a group, in order, in the worker process,
+    and puts each result in the queue 'queue', or the error that stopped the group.
+    '''
+    function, queue, tasks = task
+    try:
+        for task in tasks:
+            WORKER_QUEUES[queue].put(function(task))
+    except Exception as error:
+        WORKER_QUEUES[queue].put(error)
+
+
+def get_worker_result(queue):
+    '''
+    Gets the next result of a worker process from 'queue', raising the error of the worker if it failed.
+    '''
+    result = queue.get()
+    if isinstance(result, Exception):
+        raise result
+
+    return result
+
+
+def make_worker_frame(task):
+    '''
+    Makes a frame in the worker process and sends back its index.
+    '''
+    frame, args = task
+    WORKER_ANIMATION.make_frame(*frame, *args)
+
+    return frame[0]
+
+
+def render_worker_sizes(task):
+    '''
+    Renders a frame at several sizes in the worker process and sends back the images.
+    '''
+    (_, angle, airplanes_index), args, sizes = task
+
+    return WORKER_ANIMATION.render_sizes(angle, airplanes_index, sizes, *args)
+
+
+def write_worker_files(task):
+    '''
+    Writes a segment of the video from frames saved on disk in the worker process.
+    '''
+    import cv2
+
+    (segment_file,), fps, codec, files = task
+    WORKER_ANIMATION.write_video(segment_file, fps, (cv2.imread(file) for file in files), codec=codec)
+
+
+def write_worker_frames(task):
+    '''
+    Renders the frames of a segment of the video, at each of its sizes, and writes them in the worker process.
+    '''
+    segment_files, fps, codec, frames, args, sizes = task
+    WORKER_ANIMATION.write_videos(segment_files, fps, (
+        WORKER_ANIMATION.render_sizes(angle, airplanes_index, sizes, *args) for _, angle, airplanes_index in frames
+    ), codec=codec)
+
+
+def put_item(queue, item, errors):
+    '''
+    Puts an item in a bounded queue, unless a stage of the pipeline failed.
+    '''
+    while not errors:
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            pass
+
+    return False
+
+
+def get_item(queue, errors):
+    '''
+    Gets an item from a queue, or None if a stage of the pipeline failed.
+    '''
+    while not errors:
+        try:
+            return queue.get(timeout=0.1)
+        except Empty:
+            pass
+
+    return None
+
+
+def run_stage(function, inputs, outputs, errors):
+    '''
+    Runs a stage of the pipeline in its own thread, applying 'function' to each item of 'inputs'
+    and putting the results in 'outputs', until the end of the items, marked by None.
+    '''
+    try:
+        while True:
+            item = get_item(inputs, errors)
+            if item is None:
+                break
+            result = function(item)
+            if (outputs is not None) and not put_item(outputs, result, errors):
+                break
+    except Exception as error:
+        errors.append(error)
+    finally:
+        if outputs is not None:
+            put_item(outputs, None, errors)
 
 
 class WorldAnimation(WorldFlights):
@@ -14,6 +169,306 @@ class WorldAnimation(WorldFlights):
         and animates the globe and the airplanes.
         '''
         super().__init__(**kwargs)
+        self.cache = LRUCache(self.params['figure']['cache_size']*2**20) # the static layers, by angle and dpi
+        self.telemetry = None # the telemetry recording the making of the animation, if any
+
+    def __getstate__(self):
+        '''
+        Drops the cached layers when pickling, as they belong to the figure.
+        '''
+        state = super().__getstate__()
+        state['cache'] = LRUCache(self.cache.max_size)
+        state['telemetry'] = None
+        for name in STAGES + FRAMES:
+            state.pop(name, None) # the methods instrumented by the telemetry
+
+        return state
+
+    def to_size(self, size):
+        '''
+        Returns a copy of the animation making frames of 'size' pixels, by changing the dpi of the figure.
+        The copy shares the data and the precomputed paths of the animation, but has its own figure and cache.
+        '''
+        animation = self.__class__.__new__(self.__class__)
+        animation.__dict__.update(self.__getstate__())
+        animation.params = deepcopy(self.params)
+        animation.params['figure']['dpi'] = size/self.params['figure']['size']
+
+        return animation
+
+    @staticmethod
+    def to_frames(n_angles=9, n_rotations=1):
+        '''
+        Lists the index, the angle, and the airplanes index of each frame of the animation.
+        For scheduled flights, the airplanes index is turned into the time of the frame.
+        '''
+        shift = 9*2021 # to skew the starting point of the airplanes
+
+        return [
+            (index, (index % n_angles)*360/n_angles, index + shift)
+            for index in range(n_angles*n_rotations)
+        ]
+
+    def make_frame(self,
+                   index,
+                   angle,
+                   airplanes_index,
+                   frames_dir='frames',
+                   title='',
+                   plot_airports=True,
+                   plot_flights=True,
+                   plot_airplanes=True):
+        '''
+        Creates a single frame of the animation and saves it in 'frames_dir'.
+        '''
+        if self.is_cached():
+            import cv2
+
+            image = self.render_frame(angle, airplanes_index, title, plot_airports, plot_flights, plot_airplanes)
+            write = lambda: cv2.imwrite(osp.join(frames_dir, f'{index:04d}.png'), image)
+
+        else:
+            self.draw_frame(angle, airplanes_index, plot_airports, plot_flights, plot_airplanes)
+            write = lambda: self.savefig(f'{index:04d}', frames_dir, title)
+
+        if self.telemetry is not None:
+            write = self.telemetry.timed('write', write)
+        write()
+
+    def render_frame(self,
+                     angle,
+                     airplanes_index,
+                     title='',
+                     plot_airports=True,
+                     plot_flights=True,
+                     plot_airplanes=True):
+        '''
+        Creates a single frame of the animation and returns it as a BGR image.
+        '''
+        if self.is_cached():
+            return self.render_cached_frame(angle, airplanes_index, title, plot_airports, plot_flights, plot_airplanes)
+
+        self.draw_frame(angle, airplanes_index, plot_airports, plot_flights, plot_airplanes)
+
+        return self.to_image(title)
+
+    def render_sizes(self,
+                     angle,
+                     airplanes_index,
+                     sizes=None,
+                     title='',
+                     plot_airports=True,
+                     plot_flights=True,
+                     plot_airplanes=True):
+        '''
+        Creates a single frame of the animation at each of 'sizes' pixels and returns the BGR images.
+        The globe, the airports, the flights and the airplanes are projected, culled and simplified once,
+        at the level of detail of the largest size, and the figure is then only drawn at the dpi of each size.
+        Without 'sizes', the frame is only made at the size of the figure.
+        '''
+        args = (title, plot_airports, plot_flights, plot_airplanes)
+        if sizes is None:
+            return [self.render_frame(angle, airplanes_index, *args)]
+
+        params = self.params
+        dpis = [size/params['figure']['size'] for size in sizes]
+        self.params = dict(params, figure=dict(params['figure'], dpi=max(dpis)))
+        try:
+            if self.is_cached():
+                return self.render_cached_sizes(angle, airplanes_index, dpis, *args)
+
+            self.draw_frame(angle, airplanes_index, plot_airports, plot_flights, plot_airplanes)
+            self.add_title(title)
+            images = []
+            for dpi in dpis:
+                self.set_dpi(dpi)
+                self.fig.canvas.draw()
+                images.append(self.to_buffer())
+
+            return images
+
+        finally:
+            self.params = params
+            if hasattr(self, 'fig'):
+                self.set_dpi(params['figure']['dpi'])
+
+    def set_dpi(self, dpi):
+        '''
+        Changes the dpi of the figure, which scales the frames without changing any of the layers.
+        '''
+        if self.fig.dpi != dpi:
+            self.fig.set_dpi(dpi)
+
+    def is_cached(self):
+        '''
+        Checks if the static layers of the frames are cached.
+        '''
+        return self.is_retained() & (self.cache.max_size > 0)
+
+    def render_cached_frame(self,
+                            angle,
+                            airplanes_index,
+                            title='',
+                            plot_airports=True,
+                            plot_flights=True,
+                            plot_airplanes=True):
+        '''
+        Creates a single frame of the animation from the cached static layers at 'angle'.
+        The globe, the airports, and the flights are drawn once per angle and only the airplanes and title are added.
+        Without airplanes, the whole frame is cached and reused.
+        '''
+        return self.render_cached_sizes(
+            angle, airplanes_index, [self.params['figure']['dpi']], title, plot_airports, plot_flights, plot_airplanes
+        )[0]
+
+    def render_cached_sizes(self,
+                            angle,
+                            airplanes_index,
+                            dpis,
+                            title='',
+                            plot_airports=True,
+                            plot_flights=True,
+                            plot_airplanes=True):
+        '''
+        Creates a single frame of the animation at each of 'dpis' from the cached static layers at 'angle'.
+        The layers missing from the cache are drawn once and rasterized at each dpi,
+        and the airplanes are placed once and drawn above the layers of each dpi.
+        '''
+        angle = self.normalize_angle(angle)
+
+        if not plot_airplanes:
+            keys = [('frame', angle, title, plot_airports, plot_flights, dpi) for dpi in dpis]
+            images = [self.cache.get(key) for key in keys]
+            drawn = False
+            for index, (key, dpi) in enumerate(zip(keys, dpis)):
+                if images[index] is None:
+                    if not drawn:
+                        self.draw_frame(angle, None, plot_airports, plot_flights, plot_airplanes=False)
+                        drawn = True
+                    self.set_dpi(dpi)
+                    images[index] = self.to_image(title)
+                    self.cache.put(key, images[index], images[index].nbytes)
+
+            return images
+
+        keys = [('static', angle, plot_airports, plot_flights, dpi) for dpi in dpis]
+        backgrounds = [self.cache.get(key) for key in keys]
+        drawn = False
+        for index, (key, dpi) in enumerate(zip(keys, dpis)):
+            if backgrounds[index] is None:
+                if not drawn:
+                    self.draw_frame(angle, None, plot_airports, plot_flights, plot_airplanes=False)
+                    drawn = True
+                self.set_dpi(dpi)
+                self.fig.canvas.draw()
+                backgrounds[index] = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+                self.cache.put(key, backgrounds[index], 4*int(self.fig.bbox.width)*int(self.fig.bbox.height))
+
+        # drawing the airplanes and the title above the static layers
+        self.plot_airplanes(angle, airplanes_index=airplanes_index)
+        if title:
+            self.add_title(title)
+        images = []
+        for background, dpi in zip(backgrounds, dpis):
+            self.set_dpi(dpi)
+            self.fig.canvas.restore_region(background)
+            self.ax.draw_artist(self.artists['airplanes'])
+            if title:
+                self.ax.draw_artist(self.artists['title'])
+            images.append(self.to_buffer())
+
+        return images
+
+    def draw_frame(self,
+                   angle,
+                   airplanes_index,
+                   plot_airports=True,
+                   plot_flights=True,
+                   plot_airplanes=True):
+        '''
+        Draws the different elements of a frame on a new figure.
+        '''
+        self.set_figure()
+        self.plot_globe(angle)
+
+        if plot_airports:
+            self.plot_airports(angle)
+        if plot_flights:
+            self.plot_flights(angle)
+        if plot_airplanes:
+            self.plot_airplanes(angle, airplanes_index=airplanes_index)
+
+    def to_key(self):
+        '''
+        Returns a key identifying the parameters and the data of the animation.
+        '''
+        key = md5(json.dumps(self.params, sort_keys=True, default=str).encode())
+        for array in [
+            self.shape_xyz,
+            self.shape_offsets,
+            self.airports.coords,
+            self.airports.ratios,
+            self.flights.pairs,
+            self.flights.ratios,
+            self.flights.departures,
+            self.flights.departure_offsets,
+            self.flights.durations,
+        ]:
+            key.update(np.ascontiguousarray(array).tobytes())
+
+        return key.hexdigest()
+
+    @staticmethod
+    def to_frame_key(key, angle, airplanes_index, *args):
+        '''
+        Returns a key identifying the inputs of a frame, given the key of the animation.
+        '''
+        return md5(f'{key}:{angle!r}:{airplanes_index!r}:{args!r}'.encode()).hexdigest()
+
+    @staticmethod
+    def read_manifest(frames_dir):
+        '''
+        Reads the manifest of 'frames_dir', or returns None if there is none.
+        The first line holds the key of the animation and each of the next lines records a frame.
+        A line cut by an interrupted run is ignored.
+        '''
+        manifest_file = osp.join(frames_dir, MANIFEST)
+        if not osp.exists(manifest_file):
+            return None
+
+        manifest = None
+        with open(manifest_file, 'r') as manifest_file:
+            for line in manifest_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if manifest is None:
+                    manifest = {'key' : record.get('key'), 'frames' : {}}
+                else:
+                    manifest['frames'][record['file']] = record['key']
+
+        return manifest
+
+    @staticmethod
+    def save_manifest(frames_dir, manifest):
+        '''
+        Saves the manifest of 'frames_dir', replacing the previous one at once.
+        '''
+        manifest_file = osp.join(frames_dir, MANIFEST)
+        with open(manifest_file + '.tmp', 'w') as tmp_file:
+            tmp_file.write(json.dumps({'key' : manifest['key']}) + '\n')
+            for file, frame_key in manifest['frames'].items():
+                tmp_file.write(json.dumps({'file' : file, 'key' : frame_key}) + '\n')
+        os.replace(manifest_file + '.tmp', manifest_file)
+
+    @staticmethod
+    def record_frame(manifest_file, file, frame_key):
+        '''
+        Appends a frame saved as 'file' to the opened manifest, such that recording a frame does not rewrite the others.
+        '''
+        manifest_file.write(json.dumps({'file' : file, 'key' : frame_key}) + '\n')
+        manifest_file.flush()
 
     def make_frames(self,
                     frames_dir='frames',
@@ -22,61 +477,371 @@ class WorldAnimation(WorldFlights):
                     n_rotations=1,
                     plot_airports=True,
                     plot_flights=True,
-                    plot_airplanes=True):
+                    plot_airplanes=True,
+                    workers=1,
+                    resume=True):
         '''
         Creates the frames for the animation.
+        With more than one worker, the frames are shared between worker processes by angle, as in 'to_angle_groups'.
+        With 'resume', the frames already in 'frames_dir' are kept if they were made from the same inputs,
+        as recorded in its manifest, and only the missing or outdated frames are made.
+        Otherwise, or if the parameters or the data changed, all the frames are made again.
         '''
-        if osp.exists(frames_dir):
-            rmtree(frames_dir)
-        os.makedirs(frames_dir)
+        frames = self.to_frames(n_angles, n_rotations)
+        args = (title, plot_airports, plot_flights, plot_airplanes)
 
-        index = 0
-        shift = 9*2021 # to skew the starting point of the airplanes
-        for index_rotation in range(n_rotations):
-            for index_angle in range(n_angles):
-                angle = index_angle*360/n_angles
+        key = self.to_key()
+        manifest = self.read_manifest(frames_dir) if resume else None
+        if (manifest is None) or (manifest.get('key') != key):
+            if osp.exists(frames_dir):
+                rmtree(frames_dir)
+            os.makedirs(frames_dir)
+            manifest = {'key' : key, 'frames' : {}}
 
-                self.set_figure()
-                self.plot_globe(angle)
+        frame_keys = {
+            f'{index:04d}.png' : self.to_frame_key(key, angle, airplanes_index, *args)
+            for index, angle, airplanes_index in frames
+        }
+        # the frames that are not part of the animation anymore are removed
+        for file in os.listdir(frames_dir):
+            if file.endswith('.png') & (file not in frame_keys):
+                os.remove(osp.join(frames_dir, file))
+        manifest['frames'] = {
+            file : frame_key for file, frame_key in manifest['frames'].items()
+            if (frame_keys.get(file) == frame_key) & osp.exists(osp.join(frames_dir, file))
+        }
+        self.save_manifest(frames_dir, manifest)
 
-                if plot_airports:
-                    self.plot_airports(angle)
-                if plot_flights:
-                    self.plot_flights(angle)
-                if plot_airplanes:
-                    self.plot_airplanes(angle, airplanes_index=index + shift)
+        frames = [frame for frame in frames if f'{frame[0]:04d}.png' not in manifest['frames']]
+        if len(frame_keys) > len(frames):
+            print(f'Reusing {len(frame_keys) - len(frames)} frames already made')
 
-                self.savefig(f'{index:04d}', frames_dir, title)
-                index += 1
+        # each frame is recorded once saved, so that an interrupted run can be resumed
+        with open(osp.join(frames_dir, MANIFEST), 'a') as manifest_file:
+            if (workers > 1) & (len(frames) > 0):
+                # each worker process makes all the frames of its own angles, which keeps their static layers in its cache
+                groups, _ = self.to_angle_groups(frames, workers)
+                queue = ProcessQueue()
+                with Pool(len(groups), initializer=init_worker, initargs=(self, [queue])) as pool:
+                    for group in groups:
+                        pool.apply_async(run_worker_group, ((
+                            make_worker_frame, 0, [(frame, (frames_dir, *args)) for frame in group]
+                        ),))
+                    for _ in frames:
+                        index = get_worker_result(queue)
+                        self.record_frame(manifest_file, f'{index:04d}.png', frame_keys[f'{index:04d}.png'])
+                        if self.telemetry is not None:
+                            self.telemetry.frame_done(index)
+            else:
+                for frame in frames:
+                    self.make_frame(*frame, frames_dir, *args)
+                    self.record_frame(manifest_file, f'{frame[0]:04d}.png', frame_keys[f'{frame[0]:04d}.png'])
+                    if self.telemetry is not None:
+                        self.telemetry.frame_done(frame[0])
 
-    def frames_to_video(self, name='world', folder='.', frames_dir='frames', fps=20):
+    @staticmethod
+    def to_angle_groups(frames, groups):
         '''
-        Transforms a directory of frames into a video.
+        Splits the frames into at most 'groups' groups of frames, each group holding all the frames of some angles.
+        The angles go to the groups in turn, such that consecutive frames are in different groups,
+        and an angle is only shared between groups when there are fewer angles than groups.
+        A worker process making a group then draws the static layers of each of its angles only once.
+        Returns the groups, each in the order of the frames, and the group of each frame.
         '''
-        if not osp.exists(folder):
-            os.makedirs(folder)
-        video_file = osp.join(folder, name + '.avi')
+        angles = np.unique([angle for _, angle, _ in frames], return_inverse=True)[1]
+        n_angles = np.max(angles, initial=0) + 1
+        copies = max(1, groups//n_angles) # the groups sharing each angle
+
+        seen = np.zeros(n_angles, dtype=int)
+        owners = []
+        for angle in angles.tolist():
+            owners.append((angle + n_angles*(seen[angle] % copies)) % groups)
+            seen[angle] += 1
+        # only keeping the groups with frames
+        kept, owners = np.unique(owners, return_inverse=True)
+
+        return [[frame for frame, owner in zip(frames, owners) if owner == group] for group in range(len(kept))], owners.tolist()
+
+    @staticmethod
+    def to_video_writer(video_file, fps, shape, codec='XVID'):
+        '''
+        Opens a video writer for frames of the given shape.
+        MJPG is encoded by OpenCV itself, at a fixed quality, such that each frame is encoded independently of the others.
+        '''
+        import cv2
 
-        frames = [osp.join(frames_dir, file) for file in sorted(os.listdir(frames_dir))]
+        h, w = shape[:2]
 
-        h, w, _ = cv2.imread(frames[0]).shape
+        if codec == 'MJPG':
+            return cv2.VideoWriter(
+                video_file,
+                cv2.CAP_OPENCV_MJPEG,
+                cv2.VideoWriter_fourcc(*codec),
+                fps,
+                (w, h)
+            )
 
-        video = cv2.VideoWriter(
+        return cv2.VideoWriter(
             video_file,
-            cv2.VideoWriter_fourcc(*'XVID'),
+            cv2.VideoWriter_fourcc(*codec),
             fps,
             (w, h)
         )
 
-        for frame in frames:
-            image = cv2.imread(frame)
-            video.write(image)
+    @staticmethod
+    def to_video_frame(image):
+        '''
+        Converts an image into the contiguous 8-bit BGR frame expected by the video writer.
+        '''
+        import cv2
+
+        image = np.asarray(image)
+        if image.dtype != np.uint8:
+            image = np.clip(np.round(image), 0, 255).astype(np.uint8)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+        return np.ascontiguousarray(image)
+
+    def write_video(self, video_file, fps, images, queue_size=8, codec='XVID', count_frames=False):
+        '''
+        Writes the images into a video through a pipeline of three stages connected by bounded queues:
+        the images are produced in the current thread, converted into frames in a second thread, and written in a third one.
+        The writing overlaps with the making of the images, and at most 'queue_size' images wait between two stages,
+        such that the memory used does not depend on the number of frames.
+        With 'count_frames', the telemetry counts each frame written as a frame done.
+        '''
+        return self.write_videos([video_file], fps, ([image] for image in images), queue_size, codec, count_frames)[0]
+
+    def write_videos(self, video_files, fps, images, queue_size=8, codec='XVID', count_frames=False):
+        '''
+        Writes each list of images into the videos, the i-th image going into the i-th video, as in 'write_video'.
+        Each video has its own stages converting and writing its frames, such that the videos are encoded at the same time.
+        '''
+        images = iter(images)
+        image = next(images, None)
+        if image is None:
+            return video_files
+
+        videos = [self.to_video_writer(video_file, fps, video_image.shape, codec) for video_file, video_image in zip(video_files, image)]
+        frames = [Queue(queue_size) for _ in videos]
+        errors = [] # the errors raised by the stages, which stop the whole pipeline
+        stages = []
+        for index, video in enumerate(videos):
+            write = video.write
+            if self.telemetry is not None:
+                write = self.telemetry.timed('encode', write)
+                if count_frames & (index == 0): # each frame is counted once
+                    write = self.telemetry.counted(write)
+            video_frames = Queue(queue_size)
+            stages += [
+                Thread(target=run_stage, args=(self.to_video_frame, frames[index], video_frames, errors)),
+                Thread(target=run_stage, args=(write, video_frames, None, errors)),
+            ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            while (image is not None) and all(put_item(queue, video_image, errors) for queue, video_image in zip(frames, image)):
+                image = next(images, None)
+        finally:
+            for queue in frames:
+                put_item(queue, None, errors)
+            for stage in stages:
+                stage.join()
+            for video in videos:
+                video.release()
+
+        if errors:
+            raise errors[0]
+
+        return video_files
+
+    @staticmethod
+    def to_video_file(name='world', folder='.', codec='XVID'):
+        '''
+        Returns the file of the video, with the extension of its codec.
+        '''
+        if not osp.exists(folder):
+            os.makedirs(folder)
+
+        return osp.join(folder, name + CODECS[codec])
+
+    @staticmethod
+    def can_join(video_file):
+        '''
+        Checks if segments of the video can be joined, which needs FFmpeg for other containers than AVI.
+        '''
+        return video_file.endswith('.avi') | (which('ffmpeg') is not None)
 
-        video.release()
+    @staticmethod
+    def can_join_frames(video_file, n_frames, shape):
+        '''
+        Checks that the segments of 'n_frames' frames of the given shape can be joined into the video,
+        which is limited to 4GB for AVI files, otherwise the video is encoded by a single writer.
+        '''
+        if (not video_file.endswith('.avi')) or can_join_avi(n_frames, shape):
+            return True
+
+        print(f'\'{video_file}\' could exceed 4GB once joined, so it is encoded by a single writer instead of in chunks')
+
+        return False
+
+    @staticmethod
+    def check_chunks(video_file, codec, chunks):
+        '''
+        Checks that the video can be encoded in 'chunks' segments and joined, and raises a ValueError otherwise.
+        The segments of codecs predicting the frames from the previous ones do not give the same video as a single encoding.
+        '''
+        if chunks <= 1:
+            return
+
+        if codec not in INTRA_CODECS:
+            raise ValueError(f'The videos encoded with {codec} cannot be split into chunks, only the ones encoded with {", ".join(INTRA_CODECS)}')
+        if not WorldAnimation.can_join(video_file):
+            raise ValueError(f'The segments of \'{video_file}\' cannot be joined without FFmpeg')
+
+    @staticmethod
+    def join_videos(video_file, segments):
+        '''
+        Joins segments of a video encoded with the same parameters, without encoding them again.
+        '''
+        if video_file.endswith('.avi'):
+            return join_avi(video_file, segments)
+
+        list_file = video_file + '.txt'
+        with open(list_file, 'w') as segments_list:
+            segments_list.writelines(f'file \'{osp.abspath(segment)}\'\n' for segment in segments)
+        subprocess.run([
+            which('ffmpeg'), '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_file, '-c', 'copy', video_file
+        ], check=True)
+        os.remove(list_file)
+
+        return video_file
+
+    def write_chunks(self, video_files, fps, codec, function, chunks, *args):
+        '''
+        Writes each chunk of frames as a segment of each of the videos in its own process, with 'function',
+        then joins the segments into the videos.
+        '''
+        segments = [
+            [f'{root}.{index:04d}{extension}' for index in range(len(chunks))]
+            for root, extension in map(osp.splitext, video_files)
+        ]
+
+        with Pool(len(chunks), initializer=init_worker, initargs=(self,)) as pool:
+            pool.map(function, [
+                ([video_segments[index] for video_segments in segments], fps, codec, chunk, *args)
+                for index, chunk in enumerate(chunks)
+            ])
+        for video_file, video_segments in zip(video_files, segments):
+            self.join_videos(video_file, video_segments)
+            for segment in video_segments:
+                os.remove(segment)
+
+        return video_files
+
+    @staticmethod
+    def to_chunks(frames, chunks):
+        '''
+        Splits the frames into at most 'chunks' contiguous chunks of similar sizes.
+        '''
+        bounds = np.linspace(0, len(frames), min(chunks, len(frames)) + 1).astype(int)
+
+        return [frames[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    @staticmethod
+    def list_frames(frames_dir):
+        '''
+        Lists the frames of 'frames_dir' in the order of their index.
+        The names of the frames have at least four digits, so the shorter names come first.
+        '''
+        files = [file for file in os.listdir(frames_dir) if file.endswith('.png')]
+
+        return [osp.join(frames_dir, file) for file in sorted(files, key=lambda file: (len(file), file))]
+
+    def frames_to_video(self, name='world', folder='.', frames_dir='frames', fps=20, codec='XVID', chunks=1):
+        '''
+        Transforms a directory of frames into a video.
+        The frames are read while the previous ones are written.
+        With more than one chunk, the frames are split into contiguous chunks encoded in parallel and joined,
+        which gives the same frames as a single encoding and is only allowed for the codecs of 'INTRA_CODECS'.
+        '''
+        import cv2
+
+        video_file = self.to_video_file(name, folder, codec)
+        self.check_chunks(video_file, codec, chunks)
+
+        frames = self.list_frames(frames_dir)
+        if not frames:
+            raise ValueError(f'There is no frame in \'{frames_dir}/\' to make the video')
+
+        if (chunks > 1) & (len(frames) > 1) and self.can_join_frames(video_file, len(frames), cv2.imread(frames[0]).shape):
+            self.write_chunks([video_file], fps, codec, write_worker_files, self.to_chunks(frames, chunks))
+        else:
+            self.write_video(video_file, fps, (cv2.imread(frame) for frame in frames), codec=codec)
         cv2.destroyAllWindows()
 
         return video_file
 
+    def stream_to_video(self,
+                        name='world',
+                        folder='.',
+                        fps=20,
+                        title='',
+                        n_angles=9,
+                        n_rotations=1,
+                        plot_airports=True,
+                        plot_flights=True,
+                        plot_airplanes=True,
+                        workers=1,
+                        codec='XVID',
+                        chunks=1,
+                        sizes=None):
+        '''
+        Renders the frames in memory and writes them directly into the video, without saving them on disk.
+        The frames are written while the next ones are rendered, with a bounded number of frames in memory.
+        With more than one worker, the frames are shared between worker processes by angle, as in 'to_angle_groups'.
+        With more than one chunk, each process renders and encodes its own contiguous chunk of frames,
+        and the segments are then joined, which is only allowed for the codecs of 'INTRA_CODECS'.
+        With 'sizes', each frame is rendered once at each of these sizes, in pixels, with 'render_sizes',
+        and written into its own video, named after its size. The list of the videos is then returned.
+        '''
+        if sizes is None:
+            video_files = [self.to_video_file(name, folder, codec)]
+        else:
+            video_files = [self.to_video_file(f'{name}_{size}', folder, codec) for size in sizes]
+        self.check_chunks(video_files[0], codec, chunks)
+
+        frames = self.to_frames(n_angles, n_rotations)
+        if not frames:
+            raise ValueError(f'There is no frame to make with {n_angles} angle(s) and {n_rotations} rotation(s)')
+        args = (title, plot_airports, plot_flights, plot_airplanes)
+
+        # the frames are square, of the largest size in pixels
+        size = int(np.ceil(max(sizes or [self.params['figure']['size']*self.params['figure']['dpi']])))
+        if (chunks > 1) & (len(frames) > 1) and self.can_join_frames(video_files[0], len(frames), (size, size)):
+            self.write_chunks(video_files, fps, codec, write_worker_frames, self.to_chunks(frames, chunks), args, sizes)
+        elif workers > 1:
+            # each worker process renders all the frames of its own angles, in order, into its own bounded queue,
+            # from which the frames are taken back in the order of the video
+            groups, owners = self.to_angle_groups(frames, workers)
+            queues = [ProcessQueue(2) for _ in groups]
+            with Pool(len(groups), initializer=init_worker, initargs=(self, queues)) as pool:
+                for index, group in enumerate(groups):
+                    pool.apply_async(run_worker_group, ((
+                        render_worker_sizes, index, [(frame, args, sizes) for frame in group]
+                    ),))
+                images = (get_worker_result(queues[owner]) for owner in owners)
+                self.write_videos(video_files, fps, images, codec=codec, count_frames=True)
+        else:
+            images = (self.render_sizes(angle, airplanes_index, sizes, *args) for _, angle, airplanes_index in frames)
+            self.write_videos(video_files, fps, images, codec=codec, count_frames=True)
+
+        return video_files[0] if sizes is None else video_files
+
     def make(self,
              name='world',
              folder='.',
@@ -87,18 +852,55 @@ class WorldAnimation(WorldFlights):
              n_rotations=5,
              plot_airports=True,
              plot_flights=True,
-             plot_airplanes=True):
+             plot_airplanes=True,
+             workers=1,
+             stream=True,
+             resume=True,
+             codec='XVID',
+             chunks=1,
+             sizes=None,
+             telemetry=None):
         '''
         Makes the animation of the world.
+        With 'stream', the frames go directly into the video, otherwise they are first saved in 'frames_dir',
+        where the frames of a previous run are reused with 'resume'.
+        The video is encoded with 'codec', in 'chunks' segments encoded in parallel if the codec encodes each frame on its own.
+        With 'sizes', a video is made at each of these sizes, in pixels, from a single rendering of the frames,
+        which needs the frames to be streamed.
+        The making of the animation is recorded by 'telemetry', if given.
         '''
-        if n_angles*n_rotations > 10000:
-            raise Exception('Too many frames for the video! You really want to see that earth spin, don\'t ya?')
+        if (n_angles < 1) | (n_rotations < 1):
+            raise ValueError(f'There is no frame to make with {n_angles} angle(s) and {n_rotations} rotation(s), both should be at least 1')
+        if (sizes is not None) & (not stream):
+            raise ValueError('The videos of several sizes can only be made by streaming the frames')
+        self.check_chunks(self.to_video_file(name, folder, codec), codec, chunks)
 
         print(f'Number of frames to be made: {n_angles*n_rotations}')
-        print(f'* check out the folder \'{frames_dir}/\' to see the frames being made *')
 
-        self.make_frames(frames_dir, title, n_angles, n_rotations, plot_airports, plot_flights, plot_airplanes)
-        print('Frames done, combining them...')
+        if telemetry is not None:
+            telemetry.start(self, n_angles*n_rotations)
+
+        try:
+            if stream:
+                video_file = self.stream_to_video(
+                    name, folder, fps, title, n_angles, n_rotations, plot_airports, plot_flights, plot_airplanes, workers,
+                    codec, chunks, sizes
+                )
+
+            else:
+                print(f'* check out the folder \'{frames_dir}/\' to see the frames being made *')
+
+                self.make_frames(
+                    frames_dir, title, n_angles, n_rotations, plot_airports, plot_flights, plot_airplanes, workers, resume
+                )
+                print('Frames done, combining them...')
+
+                video_file = self.frames_to_video(name, folder, frames_dir, fps, codec, chunks)
+
+        finally:
+            if telemetry is not None:
+                telemetry.stop()
 
-        video_file = self.frames_to_video(name, folder, frames_dir, fps)
-        print(f'Animation available at \'{video_file}\'')
\ No newline at end of file
+        video_files = video_file if isinstance(video_file, list) else [video_file]
+        for video_file in video_files:
+            print(f'Animation available at \'{video_file}\'')
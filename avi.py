@@ -0,0 +1,149 @@
+import struct
+
+
+# the size of the blocks copied from the segments into the joined file, in bytes
+BLOCK_SIZE = 2**22
+
+
+# an upper bound of the size of the headers of the AVI files written by OpenCV, in bytes
+HEADERS_SIZE = 2**16
+
+
+def to_chunks(file, start, end):
+    '''
+    Lists the chunks of a RIFF file between the positions 'start' and 'end', only reading their headers.
+    Returns the identifier, the position of the content, and the size of each chunk,
+    the identifier of a list being followed by its type.
+    '''
+    chunks = []
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        chunk_id, size = struct.unpack('<4sI', file.read(8))
+        if chunk_id in [b'RIFF', b'LIST']:
+            chunks.append((chunk_id + file.read(4), position + 12, size - 4))
+        else:
+            chunks.append((chunk_id, position + 8, size))
+        position += 8 + size + (size & 1) # the chunks are aligned on two bytes
+
+    return chunks
+
+
+def read_avi(file, avi_file):
+    '''
+    Reads the headers of an AVI file, as written by OpenCV, from the opened 'file',
+    with the position and size of the content of its 'movi' list and of its index.
+    The frames themselves are not read.
+    '''
+    file.seek(0, 2)
+    avi = {'index' : (0, 0)}
+
+    riffs = to_chunks(file, 0, file.tell())
+    if (len(riffs) != 1) or (riffs[0][0] != b'RIFFAVI '):
+        raise Exception(f'Only AVI files with a single RIFF chunk can be joined, which is not the case of \'{avi_file}\'')
+    _, start, size = riffs[0]
+
+    for chunk_id, position, size in to_chunks(file, start, start + size):
+        if chunk_id == b'LISThdrl':
+            for header_id, header_position, header_size in to_chunks(file, position, position + size):
+                if header_id == b'avih':
+                    avi['avih'] = header_position
+                elif (header_id == b'LISTstrl') & ('strh' not in avi):
+                    # only the first stream, which is the video, is updated
+                    stream_headers = to_chunks(file, header_position, header_position + header_size)
+                    avi['strh'] = [position for stream_id, position, _ in stream_headers if stream_id == b'strh'][0]
+                    if b'indx' in [stream_id for stream_id, _, _ in stream_headers]:
+                        raise Exception(f'The OpenDML index of \'{avi_file}\' cannot be joined')
+                elif header_id == b'LISTodml':
+                    extended_headers = to_chunks(file, header_position, header_position + header_size)
+                    avi['dmlh'] = [position for odml_id, position, _ in extended_headers if odml_id == b'dmlh'][0]
+        elif chunk_id == b'LISTmovi':
+            avi['movi'] = (position, size)
+            file.seek(12)
+            avi['headers'] = file.read(position - 24)
+        elif chunk_id == b'idx1':
+            avi['index'] = (position, size)
+
+    # the headers are relative to the start of the RIFF content, after its identifier, size, and type
+    avi['n_frames'] = struct.unpack_from('<I', avi['headers'], avi['avih'] - 12 + 16)[0]
+    avi['buffer_size'] = struct.unpack_from('<I', avi['headers'], avi['strh'] - 12 + 36)[0]
+
+    return avi
+
+
+def copy_data(source, destination, position, size):
+    '''
+    Copies 'size' bytes of the file 'source', from 'position', at the end of the file 'destination', block by block.
+    '''
+    source.seek(position)
+    while size > 0:
+        block = source.read(min(size, BLOCK_SIZE))
+        destination.write(block)
+        size -= len(block)
+
+
+def can_join_avi(n_frames, shape):
+    '''
+    Checks, before encoding them, that 'n_frames' frames of the given shape can be joined into an AVI file,
+    which holds at most 4GB in its single RIFF chunk.
+    Each encoded frame is bounded by the size of the frame before compression, with its chunk header and its index entry.
+    '''
+    h, w = shape[:2]
+
+    return HEADERS_SIZE + n_frames*(3*h*w + 8 + 1 + 16) < 2**32
+
+
+def join_avi(avi_file, segments):
+    '''
+    Joins AVI files encoded with the same parameters into a single one, without decoding or encoding the frames again.
+    The headers of the first segment are kept, with the number of frames and buffer sizes of the whole video,
+    and the frames of each segment follow each other in the 'movi' list and in the index.
+    The frames are copied segment by segment, such that the segments are never fully held in memory.
+    '''
+    avis = []
+    for segment in segments:
+        with open(segment, 'rb') as file:
+            avis.append(read_avi(file, segment))
+
+    movi_size = sum(avi['movi'][1] for avi in avis)
+    index_size = sum(avi['index'][1] for avi in avis)
+    headers = bytearray(avis[0]['headers'])
+
+    # the size of the joined file is known from the headers, before anything is written
+    size = 4 + len(headers) + 12 + movi_size + (8 + index_size if index_size else 0)
+    if size >= 2**32:
+        raise Exception('The joined AVI file is too large for a single RIFF chunk')
+
+    avih = avis[0]['avih'] - 12
+    strh = avis[0]['strh'] - 12
+    n_frames = sum(avi['n_frames'] for avi in avis)
+    buffer_size = max(avi['buffer_size'] for avi in avis)
+    struct.pack_into('<I', headers, avih + 16, n_frames) # the total number of frames
+    struct.pack_into('<I', headers, avih + 28, buffer_size) # the suggested buffer size
+    struct.pack_into('<I', headers, strh + 32, n_frames) # the length of the stream
+    struct.pack_into('<I', headers, strh + 36, buffer_size)
+    if 'dmlh' in avis[0]:
+        struct.pack_into('<I', headers, avis[0]['dmlh'] - 12, n_frames) # the total number of frames of OpenDML
+
+    with open(avi_file, 'wb') as file:
+        file.write(struct.pack('<4sI4s', b'RIFF', size, b'AVI '))
+        file.write(headers)
+        file.write(struct.pack('<4sI4s', b'LIST', 4 + movi_size, b'movi'))
+        for segment, avi in zip(segments, avis):
+            with open(segment, 'rb') as segment_file:
+                copy_data(segment_file, file, *avi['movi'])
+
+        if index_size:
+            file.write(struct.pack('<4sI', b'idx1', index_size))
+            shift = 0 # the position of the frames of a segment in the joined 'movi' list
+            for segment, avi in zip(segments, avis):
+                with open(segment, 'rb') as segment_file:
+                    position, size = avi['index']
+                    segment_file.seek(position)
+                    file.write(b''.join(
+                        struct.pack('<4sIII', chunk_id, flags, offset + shift, entry_size)
+                        for chunk_id, flags, offset, entry_size in struct.iter_unpack('<4sIII', segment_file.read(size))
+                    ))
+                shift += avi['movi'][1]
+
+    return avi_file
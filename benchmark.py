@@ -0,0 +1,327 @@
+import os
+import os.path as osp
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import resource
+import tracemalloc
+from shutil import rmtree
+
+import numpy as np
+import shapefile
+
+from config import PARAMS
+
+
+class Benchmark(object):
+
+    def __init__(self, bench_dir='benchmark', params=PARAMS, seed=0, memory=True):
+        '''
+        The 'Benchmark' class measures the time and memory of each stage of the animation on synthetic data.
+        The shapes, airports and routes are randomly generated in 'bench_dir', in the formats read by 'MapLoader',
+        such that the whole chain, from the files to the video, can be measured without the original datasets.
+        With 'memory', each stage is run a second time while tracing its allocations, which would slow down the timed run.
+        '''
+        self.bench_dir = bench_dir
+        self.params = params
+        self.seed = seed
+        self.memory = memory
+        self.results = []
+
+    @staticmethod
+    def random_coords(rng, n_points):
+        '''
+        Generates points uniformly distributed on the globe, as longitudes and latitudes in degree.
+        '''
+        longitudes = rng.uniform(-180, 180, n_points)
+        latitudes = np.arcsin(rng.uniform(-1, 1, n_points))*180/np.pi
+
+        return np.stack([longitudes, latitudes], axis=1)
+
+    def make_shapes(self, folder, n_vertices, vertices_per_shape=500):
+        '''
+        Generates land shapes with about 'n_vertices' vertices in total, saved as a shapefile.
+        Each shape is a noisy star around a random center, drawn clockwise as the land of the Natural Earth shapes.
+        '''
+        rng = np.random.default_rng(self.seed)
+        n_shapes = max(int(np.ceil(n_vertices/vertices_per_shape)), 1)
+        centers = self.random_coords(rng, n_shapes)
+        centers[:,1] *= 0.8 # keeping the shapes away from the poles
+
+        writer = shapefile.Writer(osp.join(self.bench_dir, folder, folder), shapeType=shapefile.POLYGON)
+        writer.field('NAME', 'C')
+        for index, (longitude, latitude) in enumerate(centers):
+            n_points = max(min(vertices_per_shape, n_vertices - index*vertices_per_shape), 3)
+            angles = - np.linspace(0, 2*np.pi, n_points, endpoint=False)
+            radius = rng.uniform(2, 10)*(1 + 0.2*np.sin(rng.integers(2, 8)*angles + rng.uniform(0, 2*np.pi)))
+            radius *= rng.uniform(0.9, 1.1, n_points)
+            points = np.stack([
+                longitude + radius*np.cos(angles)/np.cos(latitude*np.pi/180),
+                latitude + radius*np.sin(angles),
+            ], axis=1)
+            writer.poly([points.tolist() + points[:1].tolist()])
+            writer.record(f'shape{index}')
+        writer.close()
+
+    def make_places(self, folder, n_airports):
+        '''
+        Generates the locations of the airports, saved as a shapefile of points.
+        '''
+        rng = np.random.default_rng(self.seed + 1)
+
+        writer = shapefile.Writer(osp.join(self.bench_dir, folder, folder), shapeType=shapefile.POINT)
+        writer.field('NAME', 'C')
+        writer.field('LONGITUDE', 'N', decimal=6)
+        writer.field('LATITUDE', 'N', decimal=6)
+        for index, (longitude, latitude) in enumerate(self.random_coords(rng, n_airports)):
+            writer.point(longitude, latitude)
+            writer.record(f'City{index}', longitude, latitude)
+        writer.close()
+
+    def make_routes(self, routes_file, n_routes, n_airports):
+        '''
+        Generates the routes between random airports, saved as a CSV file with the columns of the original spreadsheet.
+        The metrics follow a heavy-tailed distribution, as the passengers of real routes.
+        '''
+        rng = np.random.default_rng(self.seed + 2)
+        n_airports = max(n_airports, 2)
+        starts = rng.integers(0, n_airports, n_routes)
+        ends = (starts + rng.integers(1, n_airports, n_routes)) % n_airports
+        metrics = np.round(rng.pareto(1.5, n_routes)*1e6 + 1e5)
+
+        with open(osp.join(self.bench_dir, routes_file), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['ORIGIN_CITY_NAME - DEST_CITY_NAME', 'Passenger Miles'])
+            for start, end, metric in zip(starts.tolist(), ends.tolist(), metrics.tolist()):
+                writer.writerow([f'City{start}, XX - City{end}, XX', metric])
+
+    def make_data(self, n_routes, n_vertices):
+        '''
+        Generates all the synthetic data in 'bench_dir'.
+        The number of airports grows with the square root of the number of routes, as in a dense network.
+        '''
+        if osp.exists(self.bench_dir):
+            rmtree(self.bench_dir)
+        for folder in ['land', 'places']:
+            os.makedirs(osp.join(self.bench_dir, folder))
+
+        n_airports = max(int(4*n_routes**.5), 2)
+        self.make_shapes('land', n_vertices)
+        self.make_places('places', n_airports)
+        self.make_routes('routes.csv', n_routes, n_airports)
+
+    def measure(self, function, n_items=1):
+        '''
+        Runs 'function' and returns its result along with its time, its throughput in items per second,
+        and the peak of the memory allocated while it runs, in bytes.
+        '''
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+
+        peak = None
+        if self.memory:
+            tracemalloc.start()
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return result, {
+            'seconds' : seconds,
+            'items' : n_items,
+            'throughput' : n_items/seconds if seconds > 0 else None,
+            'peak_memory' : peak,
+        }
+
+    @staticmethod
+    def add_measure(stages, name, measure):
+        '''
+        Adds a measure to the stage 'name', summing the times and items and keeping the largest peak of memory.
+        '''
+        if name not in stages:
+            stages[name] = measure
+            return
+
+        stage = stages[name]
+        stage['seconds'] += measure['seconds']
+        stage['items'] += measure['items']
+        stage['throughput'] = stage['items']/stage['seconds'] if stage['seconds'] > 0 else None
+        if measure['peak_memory'] is not None:
+            stage['peak_memory'] = max(stage['peak_memory'], measure['peak_memory'])
+
+    def run(self, n_routes=1000, n_vertices=10000, n_frames=4, frames_dir=None):
+        '''
+        Measures each stage of the animation on synthetic data with 'n_routes' routes and 'n_vertices' vertices of land.
+        The frames are saved in 'frames_dir', by default inside 'bench_dir'.
+        '''
+        from data import MapLoader
+        from animate import WorldAnimation
+
+        self.make_data(n_routes, n_vertices)
+        if frames_dir is None:
+            frames_dir = osp.join(self.bench_dir, 'frames')
+        if osp.exists(frames_dir):
+            rmtree(frames_dir)
+
+        stages = {}
+        kwargs = {
+            'data_folder' : self.bench_dir,
+            'shapes_folder' : 'land',
+            'locations_folder' : 'places',
+            'routes_file' : 'routes.csv',
+        }
+        loader, measure = self.measure(lambda: MapLoader(cache_folder=None, **kwargs), n_routes)
+        self.add_measure(stages, 'ingest', measure)
+        MapLoader(**kwargs) # building the cache
+        loader, measure = self.measure(lambda: MapLoader(**kwargs), n_routes)
+        self.add_measure(stages, 'ingest_cached', measure)
+
+        animation = WorldAnimation(
+            shapes=loader.to_shapes(),
+            airports=loader.to_airports(),
+            flights=loader.to_flights(),
+            params=self.params,
+        )
+        _, measure = self.measure(animation.__path__, len(animation.flights))
+        self.add_measure(stages, 'path', measure)
+
+        for index, angle, airplanes_index in animation.to_frames(n_frames, 1):
+            for name, function in [
+                ('set_figure', animation.set_figure),
+                ('plot_globe', lambda: animation.plot_globe(angle)),
+                ('plot_shade', lambda: animation.plot_shade(angle)),
+                ('plot_airports', lambda: animation.plot_airports(angle)),
+                ('plot_flights', lambda: animation.plot_flights(angle)),
+                ('plot_airplanes', lambda: animation.plot_airplanes(angle, airplanes_index=airplanes_index)),
+                ('savefig', lambda: animation.savefig(f'{index:04d}', frames_dir)),
+            ]:
+                _, measure = self.measure(function)
+                self.add_measure(stages, name, measure)
+
+        _, measure = self.measure(
+            lambda: animation.frames_to_video('benchmark', self.bench_dir, frames_dir, fps=20), n_frames
+        )
+        self.add_measure(stages, 'frames_to_video', measure)
+
+        result = {
+            'routes' : n_routes,
+            'airports' : len(animation.airports),
+            'flights' : len(animation.flights),
+            'vertices' : int(len(animation.shape_xyz)),
+            'path_points' : int(len(animation.path_xyz)),
+            'frames' : n_frames,
+            'stages' : stages,
+            'max_rss' : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024, # the peak of the process so far, in bytes
+        }
+        self.results.append(result)
+
+        return result
+
+    @staticmethod
+    def compare(frames_dir, reference_dir, tolerance=0):
+        '''
+        Compares the frames with the reference frames of the same name, pixel by pixel.
+        The frames match if no channel of any pixel differs by more than 'tolerance'.
+        '''
+        import cv2
+
+        frames = {}
+        for file in sorted(os.listdir(reference_dir)):
+            if not file.endswith('.png'):
+                continue
+            reference = cv2.imread(osp.join(reference_dir, file), cv2.IMREAD_UNCHANGED)
+            frame_file = osp.join(frames_dir, file)
+            frame = cv2.imread(frame_file, cv2.IMREAD_UNCHANGED) if osp.exists(frame_file) else None
+            if (frame is None) or (frame.shape != reference.shape):
+                frames[file] = {'match' : False, 'max_diff' : None, 'diff_pixels' : None}
+                continue
+
+            diff = np.abs(frame.astype(int) - reference.astype(int))
+            diff = diff.max(axis=2) if diff.ndim == 3 else diff
+            frames[file] = {
+                'match' : bool(diff.max() <= tolerance),
+                'max_diff' : int(diff.max()),
+                'diff_pixels' : float(np.mean(diff > tolerance)),
+            }
+
+        return {
+            'match' : bool(frames) and all(frame['match'] for frame in frames.values()),
+            'frames' : frames,
+        }
+
+    @staticmethod
+    def to_machine():
+        '''
+        Describes the machine running the benchmark.
+        '''
+        import matplotlib
+
+        return {
+            'python' : platform.python_version(),
+            'platform' : platform.platform(),
+            'cpus' : os.cpu_count(),
+            'numpy' : np.__version__,
+            'matplotlib' : matplotlib.__version__,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+
+    # sizes of the synthetic data
+    parser.add_argument('--routes', type=int, nargs='+', default=[10, 1000, 10000],
+        help='the numbers of routes to benchmark')
+    parser.add_argument('--vertices', type=int, nargs='+', default=[10000],
+        help='the numbers of vertices of the land shapes to benchmark')
+    parser.add_argument('--frames', type=int, default=4,
+        help='the number of frames made for each size')
+    parser.add_argument('--seed', type=int, default=0,
+        help='the seed of the synthetic data')
+    parser.add_argument('--memory', type=int, default=1,
+        help='if the peak memory of each stage is measured, which runs it twice (0 = not measured; 1 = measured)')
+    # outputs of the benchmark
+    parser.add_argument('--bench_dir', type=str, default='benchmark',
+        help='where to save the synthetic data and the frames')
+    parser.add_argument('--output', type=str, default='',
+        help='the JSON file of the results (printed if empty)')
+    # checking the frames
+    parser.add_argument('--reference', type=str, default='',
+        help='a folder of reference frames to compare the frames of the last size with')
+    parser.add_argument('--save_reference', type=str, default='',
+        help='a folder where to save the frames of the last size as reference')
+    parser.add_argument('--tolerance', type=int, default=0,
+        help='the largest difference of a pixel channel for the frames to match the reference')
+
+    args = parser.parse_args()
+    import matplotlib
+    matplotlib.use('Agg') # the frames are only saved
+
+    bench = Benchmark(args.bench_dir, PARAMS, args.seed, bool(args.memory))
+    for n_routes in args.routes:
+        for n_vertices in args.vertices:
+            bench.run(n_routes, n_vertices, args.frames)
+            print(f'Benchmarked {n_routes} routes and {n_vertices} vertices', file=sys.stderr)
+
+    report = {'machine' : bench.to_machine(), 'results' : bench.results}
+    frames_dir = osp.join(args.bench_dir, 'frames')
+    if args.save_reference:
+        if osp.exists(args.save_reference):
+            rmtree(args.save_reference)
+        os.makedirs(args.save_reference)
+        for file in os.listdir(frames_dir):
+            os.replace(osp.join(frames_dir, file), osp.join(args.save_reference, file))
+        frames_dir = args.save_reference
+    if args.reference:
+        report['comparison'] = bench.compare(frames_dir, args.reference, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.reference and not report['comparison']['match']:
+        sys.exit(1)
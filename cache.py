@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+
+    def __init__(self, max_size=0):
+        '''
+        The 'LRUCache' class keeps the most recently used values, within a total size of 'max_size' bytes.
+        Each value is stored with its size and the least recently used values are evicted first.
+        '''
+        self.max_size = max_size
+        self.size = 0
+        self.values = OrderedDict()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key):
+        '''
+        Returns the value stored at 'key', or None if there is none.
+        '''
+        if key not in self.values:
+            return None
+
+        self.values.move_to_end(key)
+
+        return self.values[key][0]
+
+    def put(self, key, value, size):
+        '''
+        Stores 'value' at 'key' and evicts the least recently used values to stay within 'max_size'.
+        '''
+        if size > self.max_size:
+            return
+
+        if key in self.values:
+            self.size -= self.values.pop(key)[1]
+
+        self.values[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_size:
+            _, (_, old_size) = self.values.popitem(last=False)
+            self.size -= old_size
+
+    def clear(self):
+        '''
+        Removes all the values.
+        '''
+        self.values.clear()
+        self.size = 0
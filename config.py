@@ -1,9 +1,14 @@
 PARAMS = {
     'figure' : {
         'size' : 10,
+        'dpi' : 100,
         'extra_space' : 0.7,
         'background' : 'white',
-        'away' : 10,
+        'collections' : True, # draws each layer as a single collection instead of one patch per shape
+        'retained' : True, # keeps the same figure and collections from one frame to the next
+        'cache_size' : 1024, # the memory used to cache the static layers of retained figures, in MB
+        'lod' : 0.5, # the largest error allowed when simplifying the shapes and flights, in pixels (0 = no simplification)
+        'lod_limb' : 0.25, # the smallest foreshortening accounted for near the horizon when simplifying the shapes
     },
     'text' : {
         'x' : 0.3,
@@ -18,6 +23,7 @@ PARAMS = {
         'water_colour' : 'skyblue',
         'border' : 3,
         'border_colour' : 'midnightblue',
+        'horizon_step' : 2, # the angle between the points of the horizon closing the cut shapes, in degrees
     },
     'shade' : {
         'land_colour' : 'chocolate',
@@ -43,9 +49,13 @@ PARAMS = {
         'colour' : 'gold',
         'border' : 2,
         'border_colour' : 'midnightblue',
+        'density' : False, # draws the flights as a single image of their density, for very large sets of flights
+        'density_pixels' : 2, # the size of the cells of the density image, in pixels
     },
     'airplanes' : {
         'n_indices' : 2,
+        'time_step' : 0.05, # the time between two frames for scheduled flights, in hours
+        'period' : 24, # the time after which the schedule of the flights repeats itself, in hours
         'size' : 7,
         'colour' : 'crimson',
         'border' : 3,
@@ -1,10 +1,11 @@
 import os
 import os.path as osp
-import pandas as pd
+from hashlib import md5
+from shutil import rmtree
+from tempfile import mkdtemp
 import numpy as np
-from shapefile import Reader
 
-from map import WorldMap
+from network import Airports, Flights
 
 
 class MapLoader(object):
@@ -13,26 +14,54 @@ class MapLoader(object):
                  data_folder='data',
                  shapes_folder='ne_110m_land',
                  locations_folder='ne_110m_populated_places',
-                 routes_file='1000 Largest City Pairs by Number of Passengers.xlsx'):
+                 routes_file='1000 Largest City Pairs by Number of Passengers.xlsx',
+                 metric='Passenger Miles',
+                 chunk_size=100000,
+                 cache_folder='cache',
+                 lazy=False):
         '''
         The 'MapLoader' class is useful to generate the airports and flights from the given data.
         For other types or sources of data, only this code can be adapted.
+        The routes can be given as an Excel, CSV or Parquet file, the last two being read 'chunk_size' rows at a time.
+        The parsed data is kept as arrays in 'cache_folder', inside 'data_folder', and reused as long as the sources do not change.
+        Setting 'cache_folder' to None always parses the sources.
+        The libraries reading the sources are only imported when parsing them.
+        With 'lazy', the data is only read or parsed when first needed.
         '''
         self.data_folder = data_folder
         self.shapes_folder = shapes_folder
         self.locations_folder = locations_folder
         self.routes_file = routes_file
+        self.metric = metric
+        self.chunk_size = chunk_size
+        self.cache_folder = cache_folder
+        self.loaded = False
 
-        self.shapes_map = self.__load__(self.shapes_folder)
-        self.locations_map = self.__load__(self.locations_folder)
-        self.__locations__()
-        self.routes_df = pd.read_excel(osp.join(self.data_folder, self.routes_file))
-        self.__routes__()
+        if not lazy:
+            self.load()
+
+    def load(self):
+        '''
+        Reads the data from the cache, or parses the sources if the cache is not up to date.
+        '''
+        if self.loaded:
+            return
+
+        if not self.__read__():
+            self.shapes_map = self.__load__(self.shapes_folder)
+            self.__shapes__()
+            self.locations_map = self.__load__(self.locations_folder)
+            self.__locations__()
+            self.__routes__(self.metric)
+            self.__save__()
+        self.loaded = True
 
     def __load__(self, folder, extensions=['cpg', 'dbf', 'prj', 'shp', 'shx']):
         '''
         Loads a shapefile object.
         '''
+        from shapefile import Reader
+
         kwargs = {}
         for extension in extensions:
             extension_file = osp.join(self.data_folder, folder, folder + '.' + extension)
@@ -41,37 +70,166 @@ class MapLoader(object):
 
         return Reader(**kwargs)
 
+    def __shapes__(self):
+        '''
+        Transforms the 'shapes_map' into a single array of coordinates and the offsets of each ring.
+        Each part of a shape is its own ring, such that the holes of the shapes stay separate from their outer ring.
+        '''
+        from map import WorldMap
+
+        shapes = [
+            ring
+            for shape in self.shapes_map.shapes()
+            for ring in np.split(np.reshape(np.asarray(shape.points, dtype=float), (-1, 2)), shape.parts[1:])
+            if len(ring)
+        ]
+        self.shape_coords, self.shape_offsets = WorldMap.to_ragged(shapes)
+
     def __locations__(self):
         '''
-        Transforms the 'locations_map' into a dictionary.
+        Transforms the 'locations_map' into arrays of names and coordinates.
+        '''
+        records = self.locations_map.records()
+        names = np.array([record.NAME.lower() for record in records], dtype=str)
+        coords = np.reshape([(record.LONGITUDE, record.LATITUDE) for record in records], (-1, 2))
+
+        first, last = self.to_unique(names)
+        self.location_names = names[first]
+        self.location_coords = coords[last]
+
+    def __chunks__(self, columns):
+        '''
+        Reads the routes file by chunks of rows, only keeping the given columns.
+        Excel files cannot be streamed and are read at once.
+        '''
+        import pandas as pd
+
+        routes_file = osp.join(self.data_folder, self.routes_file)
+        extension = osp.splitext(routes_file)[1].lower()
+
+        if extension == '.csv':
+            yield from pd.read_csv(routes_file, usecols=columns, chunksize=self.chunk_size)
+        elif extension == '.parquet':
+            from pyarrow.parquet import ParquetFile
+            for batch in ParquetFile(routes_file).iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield pd.read_excel(routes_file, usecols=columns)
+
+    def __routes__(self, metric='Passenger Miles', column='ORIGIN_CITY_NAME - DEST_CITY_NAME'):
+        '''
+        Transforms the routes file into arrays of the locations of each route and of their metric.
+        Each chunk of the file is split into cities and matched with the locations at once.
+        '''
+        import pandas as pd
+
+        locations = pd.Index(self.location_names) # the names are unique, each one giving its location
+
+        cities = []
+        metrics = []
+        for chunk in self.__chunks__([column, metric]):
+            RO = chunk[column].astype(str).str.replace(' Total', '', regex=False)
+            chunk = chunk[RO != 'Grand']
+            chunk_cities = RO[RO != 'Grand'].str.split(' - ', n=1, expand=True).reindex(columns=[0, 1])
+
+            # the location of each city, or -1 if it is unknown
+            chunk_ids = np.stack([
+                locations.get_indexer(chunk_cities[side].str.split(', ').str[0].str.lower())
+                for side in [0, 1]
+            ], axis=1)
+            # only keeping the routes between known locations, in their original order
+            known = np.all(chunk_ids >= 0, axis=1)
+
+            cities.append(chunk_ids[known])
+            metrics.append(chunk[metric].to_numpy(dtype=float)[known])
+
+        cities = np.concatenate(cities) if cities else np.zeros((0, 2), dtype=int)
+        metrics = np.concatenate(metrics) if metrics else np.zeros(0)
+
+        # later duplicates overwrite the metric of a route, which keeps its first place
+        first, last = self.to_unique(cities[:,0]*len(self.location_names) + cities[:,1])
+        self.route_cities = cities[first]
+        self.route_metrics = metrics[last]
+        self.max_metric = self.scale(np.max(self.route_metrics, initial=0))
+
+    def __key__(self):
+        '''
+        Returns a key identifying the sources of the data and the metric, changing as soon as one of them is modified.
+        '''
+        sources = []
+        for folder in [self.shapes_folder, self.locations_folder]:
+            folder = osp.join(self.data_folder, folder)
+            sources += [osp.join(folder, file) for file in sorted(os.listdir(folder))]
+        sources.append(osp.join(self.data_folder, self.routes_file))
+
+        key = md5(self.metric.encode())
+        for source in sources:
+            stat = os.stat(source)
+            key.update(f'{osp.basename(source)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+
+        return key.hexdigest()
+
+    def __save__(self):
+        '''
+        Saves the parsed data as arrays in the cache, replacing the outdated versions.
         '''
-        self.locations = {}
-        for record in self.locations_map.records():
-            self.locations[record.NAME.lower()] = {
-                'coord' : (record.LONGITUDE, record.LATITUDE),
-            }
+        if self.cache_folder is None:
+            return
+
+        arrays = {
+            'shape_coords' : self.shape_coords,
+            'shape_offsets' : self.shape_offsets,
+            'location_names' : self.location_names,
+            'location_coords' : self.location_coords,
+            'route_cities' : self.route_cities,
+            'route_metrics' : self.route_metrics,
+        }
+
+        cache_folder = osp.join(self.data_folder, self.cache_folder)
+        # the arrays are written aside and moved at once, so that an interrupted run does not leave a partial cache
+        # each run writes in its own folder, such that several processes can save the cache at the same time
+        tmp_folder = mkdtemp(prefix=self.cache_folder + '.', dir=self.data_folder)
+        try:
+            for name, array in arrays.items():
+                np.save(osp.join(tmp_folder, name + '.npy'), array)
+            with open(osp.join(tmp_folder, 'key'), 'w') as key_file:
+                key_file.write(self.__key__())
+
+            rmtree(cache_folder, ignore_errors=True)
+            try:
+                os.replace(tmp_folder, cache_folder)
+            except OSError:
+                # another process moved its cache in place first, which is as good as this one
+                pass
 
-    def __routes__(self, metric='Passenger Miles'):
+        finally:
+            rmtree(tmp_folder, ignore_errors=True)
+
+    def __read__(self):
         '''
-        Transforms the 'routes_df' into a dictionary.
+        Reads the parsed data from the cache, without copying the arrays in memory.
+        Returns False if there is no up-to-date cache.
         '''
-        self.routes = {}
-        self.max_metric = 0
-        for _, line in self.routes_df.iterrows():
-            M = line[metric]
-            RO = line['ORIGIN_CITY_NAME - DEST_CITY_NAME'].replace(' Total', '')
+        if self.cache_folder is None:
+            return False
+
+        cache_folder = osp.join(self.data_folder, self.cache_folder)
+        key_file = osp.join(cache_folder, 'key')
+        if not osp.exists(key_file):
+            return False
+        with open(key_file, 'r') as key_file:
+            if key_file.read() != self.__key__():
+                return False
 
-            if RO != 'Grand':
-                city1, city2 = RO.split(' - ')
-                city1 = city1.split(', ')[0].lower()
-                city2 = city2.split(', ')[0].lower()
-                if (city1 in self.locations) & (city2 in self.locations):
-                    self.routes[city1, city2] = {
-                        'metric' : M
-                    }
-                    self.max_metric = max(self.max_metric, M)
+        arrays = {}
+        for name in ['shape_coords', 'shape_offsets', 'location_names', 'location_coords', 'route_cities', 'route_metrics']:
+            arrays[name] = np.load(osp.join(cache_folder, name + '.npy'), mmap_mode='r')
 
-        self.max_metric = self.scale(self.max_metric)
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.max_metric = self.scale(np.max(self.route_metrics, initial=0))
+
+        return True
 
     @staticmethod
     def scale(value):
@@ -80,42 +238,91 @@ class MapLoader(object):
         '''
         return value
 
+    @staticmethod
+    def to_unique(keys):
+        '''
+        Finds the distinct keys, in the order of their first appearance.
+        Returns the indices of the first and of the last appearance of each of them.
+        '''
+        keys = np.asarray(keys)
+        _, first = np.unique(keys, return_index=True)
+        _, last = np.unique(keys[::-1], return_index=True)
+        order = np.argsort(first)
+
+        return first[order], len(keys) - 1 - last[order]
+
+    def to_sizes(self):
+        '''
+        Returns the number of vertices of the shapes and the number of routes, without parsing the sources.
+        Returns None if the data is not loaded and its cache is not up to date.
+        '''
+        if not self.loaded:
+            if not self.__read__():
+                return None
+            self.loaded = True
+
+        return {
+            'vertices' : len(self.shape_coords),
+            'routes' : len(self.route_cities),
+        }
+
     def to_shapes(self):
         '''
         Transforms a class instance into its shapes, used as input of the class 'WorldMap'.
         '''
-        shapes = []
-        for shape in self.shapes_map.shapes():
-            shapes.append(shape.points)
+        self.load()
+
+        return [
+            self.shape_coords[start:end]
+            for start, end in zip(self.shape_offsets[:-1], self.shape_offsets[1:])
+        ]
+
+    def to_airport_ids(self):
+        '''
+        Lists the locations used by the routes, which are the airports, in the order of their first appearance.
+        Returns the location of each airport and the airport of each location, or -1 if it is not one.
+        '''
+        self.load()
+
+        cities = np.reshape(self.route_cities, -1)
+        first, _ = self.to_unique(cities)
+        airport_locations = cities[first]
+        location_airports = np.full(len(self.location_names), -1, dtype=int)
+        location_airports[airport_locations] = np.arange(len(airport_locations))
+
+        return airport_locations, location_airports
+
+    def to_ratios(self):
+        '''
+        Returns the ratio of each route, given by its metric.
+        '''
+        self.load()
 
-        return shapes
+        return self.scale(np.asarray(self.route_metrics, dtype=float))/self.max_metric
 
     def to_airports(self):
         '''
         Transforms a class instance into its airports, used as input of the class 'WorldFlights'.
+        The ratio of an airport is the largest ratio of its routes.
         '''
-        airports = {}
-        for cities, infos in self.routes.items():
-            ratio = self.scale(infos['metric'])/self.max_metric
-            for city in cities:
-                if city not in airports:
-                    airports[city] = {
-                        'coord' : self.locations[city]['coord'],
-                        'ratio' : ratio,
-                    }
-                else:
-                    airports[city]['ratio'] = max(airports[city]['ratio'], ratio)
+        airport_locations, location_airports = self.to_airport_ids()
+        ratios = np.full(len(airport_locations), - np.inf)
+        np.maximum.at(ratios, location_airports[np.reshape(self.route_cities, -1)], np.repeat(self.to_ratios(), 2))
 
-        return airports
+        return Airports(
+            names=self.location_names[airport_locations],
+            coords=self.location_coords[airport_locations],
+            ratios=ratios,
+        )
 
     def to_flights(self):
         '''
         Transforms a class instance into its flights, used as input of the class 'WorldFlights'.
+        The airports of the flights are identified as in 'to_airports'.
         '''
-        flights = {}
-        for cities, infos in self.routes.items():
-            flights[cities] = {
-                'ratio' : self.scale(infos['metric'])/self.max_metric
-            }
+        _, location_airports = self.to_airport_ids()
 
-        return flights
\ No newline at end of file
+        return Flights(
+            pairs=location_airports[self.route_cities],
+            ratios=self.to_ratios(),
+        )
@@ -1,7 +1,11 @@
 import numpy as np
+from matplotlib.colors import to_rgba
+from matplotlib.image import AxesImage
 from matplotlib.patches import Ellipse
+from matplotlib.collections import EllipseCollection, LineCollection
 
 from map import WorldMap
+from network import Airports, Flights
 
 
 class WorldFlights(WorldMap):
@@ -34,68 +38,130 @@ class WorldFlights(WorldMap):
         ##  }                                             ##
         ##                                                ##
         ####################################################
+
+        The flights can also follow a schedule, with the keys 'departures' (a list of departure times, in hours)
+        and 'duration' (in hours). The airplanes are then only shown on the flights that are airborne.
+        Either all the flights or none of them follow a schedule.
+
+        The airports and flights can also be given directly as 'Airports' and 'Flights' objects,
+        which store them as arrays and are used internally.
         '''
         super().__init__(**kwargs)
+        if isinstance(airports, dict):
+            airports = Airports.from_dict(airports)
+        if isinstance(flights, dict):
+            flights = Flights.from_dict(flights, airports)
         self.airports = airports
         self.flights = flights
+        self.__airports__()
         self.__path__()
+        self.__schedule__()
+
+    def __airports__(self):
+        '''
+        Pre-compute the 3D points of all the airports.
+        '''
+        self.airport_xyz = self.coord_to_xyz(self.airports.coords)
+        self.airport_ratios = self.airports.ratios
 
     def __path__(self):
         '''
-        Pre-compute the paths of all the flights.
+        Pre-compute the paths of all the flights at once.
+        The paths are stored as a single array of 3D points 'path_xyz',
+        where the i-th flight is 'path_xyz[path_offsets[i]:path_offsets[i+1]]'.
         '''
-        for a1, a2 in self.flights:
-            pair = self.airports[a1]['coord'], self.airports[a2]['coord']
-            self.flights[a1, a2]['path'] = self.to_path(pair)
+        starts = self.airports.coords[self.flights.pairs[:,0]]
+        ends = self.airports.coords[self.flights.pairs[:,1]]
+
+        self.flight_ratios = self.flights.ratios
+        self.path_xyz, self.path_offsets = self.to_paths(starts, ends)
+        self.path_ids = np.repeat(np.arange(len(self.flights)), np.diff(self.path_offsets)) # the flight of each point
+        self.path_heights = self.to_heights(self.path_offsets, max_height=self.params['flights']['max_height'])
+        self.path_bends = self.to_bends(
+            self.path_xyz*np.reshape(self.path_heights, (-1, 1)), self.path_ids, len(self.flights)
+        )
+
+    def __schedule__(self):
+        '''
+        Pre-compute the schedule of the flights as arrays sorted by departure time,
+        such that the airborne flights at any time are found with a binary search.
+        A flight lasts at most one period, otherwise it would be airborne several times at once.
+        '''
+        flights = np.repeat(np.arange(len(self.flights)), np.diff(self.flights.departure_offsets))
+        departures = self.flights.departures % self.params['airplanes']['period']
+        order = np.argsort(departures, kind='stable')
+        self.schedule_departures = departures[order]
+        self.schedule_durations = self.flights.durations[flights[order]]
+        self.schedule_flights = flights[order]
+        self.max_duration = np.max(self.schedule_durations, initial=0)
+        assert self.max_duration <= self.params['airplanes']['period']
+
+    def is_scheduled(self):
+        '''
+        Checks if the airplanes follow a schedule.
+        '''
+        return len(self.schedule_departures) > 0
 
-    def to_path(self, pair):
+    def to_airborne(self, time):
         '''
-        Finds the path between any pair of points.
+        Finds the flights airborne at 'time', in hours, with the schedule repeating itself every period.
+        Returns the flight of each airborne airplane and how far it is on its path, between 0 and 1.
         '''
-        start, end = pair
-        xyz = self.coord_to_xyz(np.stack([start, end]))
+        period = self.params['airplanes']['period']
+        time = time % period
+
+        entries = []
+        # the airplanes that left during the previous period are found one period later
+        for shift in [0, period]:
+            start = np.searchsorted(self.schedule_departures, time + shift - self.max_duration, side='right')
+            end = np.searchsorted(self.schedule_departures, time + shift, side='right')
+            entries.append(np.arange(start, end))
+        entries = np.concatenate(entries)
+
+        elapsed = (time - self.schedule_departures[entries]) % period
+        airborne = elapsed < self.schedule_durations[entries]
+        entries = entries[airborne]
+
+        return self.schedule_flights[entries], elapsed[airborne]/self.schedule_durations[entries]
+
+    def to_paths(self, starts, ends):
+        '''
+        Finds the paths between all the pairs of points 'starts[i]' and 'ends[i]'.
+        Returns the 3D points of all the paths stacked together and the offsets of each path.
+        '''
+        xyz_starts = self.coord_to_xyz(np.reshape(starts, (-1, 2)))
+        xyz_ends = self.coord_to_xyz(np.reshape(ends, (-1, 2)))
+
+        n_steps = np.sum((xyz_starts - xyz_ends)**2, axis=1)**.5/self.params['flights']['delta_step']
+        n_steps = np.maximum(np.ceil(n_steps).astype(int), 1)
+        offsets = np.concatenate([[0], np.cumsum(n_steps + 1)]).astype(int)
+        ids = np.repeat(np.arange(len(n_steps)), n_steps + 1)
 
-        n_steps = np.sum((xyz[0,:] - xyz[1,:])**2)**.5/self.params['flights']['delta_step']
-        n_steps = int(np.ceil(n_steps))
-        path = np.arange(n_steps + 1)/n_steps
+        path = (np.arange(offsets[-1]) - offsets[ids])/n_steps[ids]
         path = np.reshape(path, (-1, 1))
-        
-        path = xyz[0,:] + path*(xyz[1,:] - xyz[0,:])
+
+        path = xyz_starts[ids] + path*(xyz_ends - xyz_starts)[ids]
         path /= np.reshape((path[:,0]**2 + path[:,1]**2 + path[:,2]**2)**.5, (-1,1))
-        path = self.xyz_to_coord(path)
 
-        return path
-        
-    @staticmethod
-    def coord_to_xyz(coord):
+        return path, offsets
+
+    def to_path(self, pair):
         '''
-        Transforms coordinates into a 3D point.
+        Finds the path between any pair of points.
         '''
-        longitude, latitude = coord[:,0]*np.pi/180, coord[:,1]*np.pi/180
-        x = np.cos(longitude)*np.cos(latitude)
-        y = np.sin(longitude)*np.cos(latitude)
-        z = np.sin(latitude)
+        start, end = pair
+        path, _ = self.to_paths([start], [end])
 
-        return np.stack([x,y,z], axis=1)
+        return self.xyz_to_coord(path)
 
     @staticmethod
     def xyz_to_coord(xyz):
         '''
         Transforms a 3D point into coordinates.
         '''
-        latitude = np.arcsin(xyz[:,2])*180/np.pi
-
-        x = xyz[:,0]
-        zero_x = (x == 0).astype(float)
-        sign_x = (x > 0).astype(float) - (x < 0).astype(float)
-
-        y = xyz[:,1]
-        zero_y = (y == 0).astype(float)
-        sign_y = (y > 0).astype(float) - (y < 0).astype(float)
-
-        alpha = (x != 0)*np.arctan(y/(x + (x==0)))*180/np.pi # the basic angle
-        longitude = zero_x*90*sign_y + zero_y*(90*sign_x - 90) # if one of x or y is zero
-        longitude += (1 - zero_x)*(1 - zero_y)*(alpha + sign_y*(90 - 90*sign_x))
+        latitude = np.arcsin(np.clip(xyz[:,2], -1, 1))*180/np.pi
+        longitude = np.arctan2(xyz[:,1], xyz[:,0])*180/np.pi
+        longitude[longitude >= 180] -= 360
 
         # checking that latitude is in [-90, 90]
         assert np.all((latitude >= -90)*(latitude <= 90))
@@ -105,172 +171,339 @@ class WorldFlights(WorldMap):
         return np.stack([longitude, latitude], axis=1)
 
     @staticmethod
-    def to_height(path, max_height=1):
+    def to_heights(offsets, max_height=1):
         '''
-        Defines the heights from a path.
+        Defines the heights of all the paths stacked together, given their offsets.
         '''
-        heights = np.arange(np.size(path, axis=0))/(np.size(path, axis=0) - 1)
+        n_steps = np.diff(offsets) - 1
+        ids = np.repeat(np.arange(len(n_steps)), n_steps + 1)
+
+        heights = (np.arange(offsets[-1]) - offsets[ids])/n_steps[ids]
         heights = heights*(1 - heights)
-        heights = heights/np.max(heights)
+        # the maximum of each path is reached at its middle point
+        middles = (n_steps//2)/n_steps
+        max_heights = middles*(1 - middles)
+        heights = heights/np.where(max_heights > 0, max_heights, 1)[ids]
         heights = 1 + heights*(max_height - 1)
 
         return heights
 
+    @staticmethod
+    def to_bends(xyz, ids, n_paths):
+        '''
+        Returns the largest second difference of each path, telling how much its consecutive steps bend.
+        '''
+        bends = np.sum((xyz[2:] - 2*xyz[1:-1] + xyz[:-2])**2, axis=1)**.5
+        # only the second differences of three points on the same path
+        bends = np.where(ids[2:] == ids[:-2], bends, 0)
+        path_bends = np.zeros(n_paths)
+        np.maximum.at(path_bends, ids[1:-1], bends)
+
+        return path_bends
+
+    def to_airport_ellipses(self, angle):
+        '''
+        Projects the airports and returns the visible ones with their ratios,
+        how flattened they are, and the angle of their ellipse.
+        '''
+        points, visible = self.project(self.airport_xyz, angle)
+        points, ratios = points[visible], self.airport_ratios[visible]
+
+        # the distance from the central point of the globe
+        dist = np.arccos(np.clip(np.sum(points**2, axis=1)**.5, 0, 1))*2/np.pi
+        # the angle from the central point of the globe
+        ang = np.where(
+            points[:,0] == 0,
+            np.where(points[:,1] > 0, 90, -90),
+            np.arctan(points[:,1]/np.where(points[:,0] == 0, 1, points[:,0]))*180/np.pi,
+        )
+
+        return points, ratios, dist, ang
+
     def plot_airports(self, angle):
         '''
         Plots the airports.
         '''
         angle = self.normalize_angle(angle)
 
-        for airport_info in self.airports.values():
-            ratio = airport_info['ratio'] # the ratio of the airport
-            for turn in [-1, 0, 1]:
-                point, unseen = self.project(airport_info['coord'], angle, turn)
-                if not unseen:
-                    # the distance from the central point of the globe
-                    dist = np.arccos((point[0]**2 + point[1]**2)**.5)*2/np.pi
-                    # the angle from the central point of the globe
-                    if point[0] == 0:
-                        if point[1] > 0:
-                            ang = 90
-                        else:
-                            ang = -90
-                    else:
-                        ang = np.arctan(point[1]/point[0])*180/np.pi
-
-                    self.ax.add_patch(Ellipse(
-                        xy=point,
-                        width=ratio*self.params['airports']['size']*dist,
-                        height=ratio*self.params['airports']['size'],
-                        angle=ang,
-                        facecolor=self.params['airports']['colour'],
-                        edgecolor=self.params['airports']['border_colour'],
-                        lw=ratio*self.params['airports']['border'],
-                        zorder=self.params['zorder']['airports'],
-                        clip_path=self.globe,
-                        alpha=ratio,
-                    ))
+        points, ratios, dist, ang = self.to_airport_ellipses(angle)
+
+        if self.params['figure']['collections']:
+            airports = self.to_layer('airports', lambda: EllipseCollection(
+                widths=[],
+                heights=[],
+                angles=[],
+                units='xy',
+                offsets=np.zeros((0, 2)),
+                offset_transform=self.ax.transData,
+                zorder=self.params['zorder']['airports'],
+            ))
+            airports.set_widths(ratios*self.params['airports']['size']*dist)
+            airports.set_heights(ratios*self.params['airports']['size'])
+            airports.set_angles(ang)
+            airports.set_offsets(points)
+            airports.set_facecolor(self.to_colours(self.params['airports']['colour'], ratios))
+            airports.set_edgecolor(self.to_colours(self.params['airports']['border_colour'], ratios))
+            airports.set_linewidths(ratios*self.params['airports']['border'])
+
+        else:
+            self.plot_airports_patches(points, ratios, dist, ang)
+
+    def plot_airports_patches(self, points, ratios, dist, ang):
+        '''
+        Plots the airports as one patch per airport.
+        '''
+        for point, ratio, airport_dist, airport_ang in zip(points, ratios, dist, ang):
+            self.ax.add_patch(Ellipse(
+                xy=point,
+                width=ratio*self.params['airports']['size']*airport_dist,
+                height=ratio*self.params['airports']['size'],
+                angle=airport_ang,
+                facecolor=self.params['airports']['colour'],
+                edgecolor=self.params['airports']['border_colour'],
+                lw=ratio*self.params['airports']['border'],
+                zorder=self.params['zorder']['airports'],
+                alpha=ratio,
+            ))
+
+    def to_strides(self, tolerance=0):
+        '''
+        Returns, for each path, the number of steps that can be merged into one segment with an error of at most 'tolerance'.
+        A piece of 'k' steps is at most 'k**2/8' times the largest second difference of the path away from its chord.
+        '''
+        return np.maximum((8*tolerance/np.maximum(self.path_bends, 1e-12))**.5, 1).astype(int)
+
+    def to_flight_segments(self, angle, airplanes_index=None, tolerance=0):
+        '''
+        Projects all the flights at once and splits them into visible segments.
+        If 'airplanes_index' is given, only the points representing the airplanes are kept.
+        Otherwise, the paths are simplified up to an error of 'tolerance'.
+        Returns the list of segments and the ratio of the flight each segment belongs to.
+        '''
+        xyz, heights, ids, offsets = self.path_xyz, self.path_heights, self.path_ids, self.path_offsets
+        flights = np.arange(len(self.flight_ratios)) # the flight of each id
+
+        if airplanes_index is not None:
+            xyz, heights, ids, flights = self.to_airplanes(airplanes_index)
+
+        # segments are used for paths going behind the globe
+        points, visible = self.project(xyz, angle, r=heights)
+
+        if (airplanes_index is None) & (tolerance > 0):
+            strides = self.to_strides(tolerance)[ids]
+            indices = np.arange(len(xyz)) - offsets[ids]
+            last_indices = np.diff(offsets)[ids] - 1
+            # the points next to the horizon are kept, so that the paths go exactly as far as before
+            horizon = (visible != np.roll(visible, 1)) | (visible != np.roll(visible, -1))
+            kept = (indices % strides == 0) | (indices == last_indices) | horizon
+            points, visible, ids = points[kept], visible[kept], ids[kept]
+
+        segments, segment_ids = self.to_segments(points, visible, ids)
+
+        return segments, self.flight_ratios[flights[segment_ids]]
+
+    def to_airplanes(self, airplanes_index):
+        '''
+        Finds the points representing the airplanes at 'airplanes_index', only looking at the flights carrying one.
+        Without schedule, each flight has an airplane going along its path, one step per index.
+        With a schedule, 'airplanes_index' is turned into a time and the airplanes are placed given the time since their departure.
+        Returns the 3D points and heights of the airplanes, the airplane of each point, and the flight of each airplane.
+        '''
+        n_indices = self.params['airplanes']['n_indices'] # the number of indices to represent the planes
+        lengths = np.diff(self.path_offsets)
+
+        if self.is_scheduled():
+            flights, progress = self.to_airborne(airplanes_index*self.params['airplanes']['time_step'])
+            starts = np.floor(progress*(lengths[flights] + n_indices)).astype(int) - n_indices
+        else:
+            flights = np.arange(len(lengths))
+            starts = (airplanes_index % (lengths + n_indices)) - n_indices
+
+        # the position on its path of each point of the airplanes, only keeping the ones on the path
+        airplanes = np.repeat(np.arange(len(flights)), n_indices)
+        indices = (np.reshape(starts, (-1, 1)) + np.arange(n_indices)).flatten()
+        kept = (indices >= 0) & (indices < lengths[flights][airplanes])
+        airplanes = airplanes[kept]
+        points = self.path_offsets[:-1][flights][airplanes] + indices[kept]
+
+        return self.path_xyz[points], self.path_heights[points], airplanes, flights
+
+    @staticmethod
+    def to_colours(colour, ratios):
+        '''
+        Returns an array with one colour per ratio, each ratio being used as transparency.
+        '''
+        colours = np.tile(to_rgba(colour), (len(ratios), 1))
+        colours[:,3] = ratios
+
+        return colours
+
+    @staticmethod
+    def update_lines(lines, segments, linewidths, colours):
+        '''
+        Updates the segments of a collection of lines with their widths and colours.
+        '''
+        lines.set_segments(segments)
+        lines.set_linewidths(linewidths)
+        lines.set_color(colours)
+
+    def to_density(self, angle):
+        '''
+        Accumulates the visible points of all the flights into a raster, each point weighted by the ratio of its flight.
+        The raster covers the square reached by the highest flights and gives the opacity of each of its cells,
+        which grows with the density of the flights and saturates where many of them overlap.
+        Returns the raster and its extent.
+        '''
+        max_height = max(self.params['flights']['max_height'], 1)
+        cell = self.params['flights']['density_pixels']*self.to_pixel()
+        n_cells = int(np.ceil(2*max_height/cell))
+
+        points, visible = self.project(self.path_xyz, angle, r=self.path_heights)
+        # the cell of each visible point, counted with a single pass over the points
+        cells = np.floor((points[visible] + max_height)*n_cells/(2*max_height)).astype(int)
+        cells = np.clip(cells, 0, n_cells - 1)
+        density = np.bincount(
+            cells[:,1]*n_cells + cells[:,0],
+            weights=self.flight_ratios[self.path_ids[visible]],
+            minlength=n_cells**2,
+        ).reshape((n_cells, n_cells))
+        # the number of points left in a cell by a flight going through it
+        flight_density = 2*max_height/n_cells/self.params['flights']['delta_step']
+
+        return 1 - np.exp(- density/flight_density), [-max_height, max_height, -max_height, max_height]
+
+    def plot_density(self, angle):
+        '''
+        Plots the flights as a single image of their density, whose cost only depends on the number of points of the flights.
+        '''
+        opacity, extent = self.to_density(angle)
+        image = np.zeros(opacity.shape + (4,))
+        image[:,:,:3] = to_rgba(self.params['flights']['colour'])[:3]
+        image[:,:,3] = opacity
+
+        if self.params['figure']['collections']:
+            density = self.to_layer('flights_density', lambda: AxesImage(
+                self.ax,
+                origin='lower',
+                interpolation='nearest',
+                zorder=self.params['zorder']['flights'],
+            ))
+            density.set_data(image)
+            density.set_extent(extent)
+            return
+
+        self.ax.imshow(image,
+            extent=extent,
+            origin='lower',
+            interpolation='nearest',
+            zorder=self.params['zorder']['flights'],
+        )
 
     def plot_flights(self, angle):
         '''
         Plots the flights.
         '''
         angle = self.normalize_angle(angle)
-
-        for flights_info in self.flights.values():
-            ratio = flights_info['ratio']
-            path = flights_info['path']
-            heights = self.to_height(path, max_height=self.params['flights']['max_height'])
-
-            # segments contains a list of connected points
-            # this is used for path going over the threshold for angles at -180/180
-            segments = []
-            points = []
-
-            for index, (coord, height) in enumerate(zip(path, heights)):
-                current_point = None
-                # checking if the point is visible or not
-                for turn in [-1, 0, 1]:
-                    point, unseen = self.project(coord, angle, turn, r=height)
-                    if not unseen:
-                        current_point = point
-
-                # if the point is visible, add to the current list of points
-                if current_point is not None:
-                    points.append(current_point)
-
-                # if the point is not visible, add the points to a new segment and restart the process
-                else:
-                    segments.append(points)
-                    points = []
-
-            # adding the last possible segment
-            segments.append(points)
-
-            # plotting the segments
-            for points in segments:
-                if points: # non-empty segment
-                    x, y = zip(*points)
-                    # plotting the border of the flights
-                    self.ax.plot(x, y,
-                        solid_joinstyle='round',
-                        solid_capstyle='round',
-                        linewidth=ratio*self.params['flights']['size'] + self.params['flights']['border'],
-                        color=self.params['flights']['border_colour'],
-                        zorder=self.params['zorder']['flights_border'],
-                        alpha=ratio,
-                    )
-                    # plotting the flights
-                    self.ax.plot(x, y,
-                        solid_joinstyle='round',
-                        solid_capstyle='round',
-                        linewidth=ratio*self.params['flights']['size'],
-                        color=self.params['flights']['colour'],
-                        zorder=self.params['zorder']['flights'],
-                        alpha=ratio,
-                    )
+        if self.params['flights']['density']:
+            self.plot_density(angle)
+            return
+
+        segments, ratios = self.to_flight_segments(angle, tolerance=self.to_tolerance())
+
+        if self.params['figure']['collections']:
+            # plotting the border of the flights
+            self.update_lines(
+                self.to_layer('flights_border', lambda: LineCollection(
+                    [],
+                    capstyle='round',
+                    joinstyle='round',
+                    zorder=self.params['zorder']['flights_border'],
+                )),
+                segments,
+                ratios*self.params['flights']['size'] + self.params['flights']['border'],
+                self.to_colours(self.params['flights']['border_colour'], ratios),
+            )
+            # plotting the flights
+            self.update_lines(
+                self.to_layer('flights', lambda: LineCollection(
+                    [],
+                    capstyle='round',
+                    joinstyle='round',
+                    zorder=self.params['zorder']['flights'],
+                )),
+                segments,
+                ratios*self.params['flights']['size'],
+                self.to_colours(self.params['flights']['colour'], ratios),
+            )
+            return
+
+        for points, ratio in zip(segments, ratios):
+            x, y = points[:,0], points[:,1]
+            # plotting the border of the flights
+            self.ax.plot(x, y,
+                solid_joinstyle='round',
+                solid_capstyle='round',
+                linewidth=ratio*self.params['flights']['size'] + self.params['flights']['border'],
+                color=self.params['flights']['border_colour'],
+                zorder=self.params['zorder']['flights_border'],
+                alpha=ratio,
+            )
+            # plotting the flights
+            self.ax.plot(x, y,
+                solid_joinstyle='round',
+                solid_capstyle='round',
+                linewidth=ratio*self.params['flights']['size'],
+                color=self.params['flights']['colour'],
+                zorder=self.params['zorder']['flights'],
+                alpha=ratio,
+            )
 
     def plot_airplanes(self, angle, airplanes_index=9*2021):
         '''
         Plots the airplanes.
         '''
         angle = self.normalize_angle(angle)
-
-        for flights_info in self.flights.values():
-            ratio = flights_info['ratio']
-            path = flights_info['path']
-            heights = self.to_height(path, max_height=self.params['flights']['max_height'])
-
-            # segments contains a list of connected points
-            # this is used for path going over the threshold for angles at -180/180
-            segments = []
-            points = []
-            n_indices = self.params['airplanes']['n_indices'] # the number of indices to represent the planes
-            airplane_index = (airplanes_index % (len(path) + n_indices)) - n_indices
-
-            for index, (coord, height) in enumerate(zip(path, heights)):
-                if (index >= airplane_index) & (index < airplane_index + n_indices):
-                    current_point = None
-                    # checking if the point is visible or not
-                    for turn in [-1, 0, 1]:
-                        point, unseen = self.project(coord, angle, turn, r=height)
-                        if not unseen:
-                            current_point = point
-
-                    # if the point is visible, add to the current list of points
-                    if current_point is not None:
-                        points.append(current_point)
-
-                    # if the point is not visible, add the points to a new segment and restart the process
-                    else:
-                        segments.append(points)
-                        points = []
-
-            # adding the last possible segment
-            segments.append(points)
-
+        segments, ratios = self.to_flight_segments(angle, airplanes_index)
+
+        if self.params['figure']['collections']:
+            # the border of each airplane is plotted right before the airplane itself
+            linewidths = ratios*self.params['airplanes']['size']
+            self.update_lines(
+                self.to_layer('airplanes', lambda: LineCollection(
+                    [],
+                    capstyle='round',
+                    joinstyle='round',
+                    zorder=self.params['zorder']['airplanes'],
+                )),
+                [points for points in segments for _ in range(2)],
+                np.stack([linewidths + self.params['airplanes']['border'], linewidths], axis=1).flatten(),
+                np.stack([
+                    self.to_colours(self.params['airplanes']['border_colour'], ratios),
+                    self.to_colours(self.params['airplanes']['colour'], ratios),
+                ], axis=1).reshape((-1, 4)),
+            )
+            return
+
+        for points, ratio in zip(segments, ratios):
+            x, y = points[:,0], points[:,1]
+            # plotting the border of the airplanes
+            self.ax.plot(x, y,
+                solid_joinstyle='round',
+                solid_capstyle='round',
+                linewidth=ratio*self.params['airplanes']['size'] + self.params['airplanes']['border'],
+                color=self.params['airplanes']['border_colour'],
+                zorder=self.params['zorder']['airplanes'],
+                alpha=ratio,
+            )
             # plotting the airplanes
-            for points in segments:
-                if points: # non-empty segment
-                    x, y = zip(*points)
-                    # plotting the border of the airplanes
-                    self.ax.plot(x, y,
-                        solid_joinstyle='round',
-                        solid_capstyle='round',
-                        linewidth=ratio*self.params['airplanes']['size'] + self.params['airplanes']['border'],
-                        color=self.params['airplanes']['border_colour'],
-                        zorder=self.params['zorder']['airplanes'],
-                        alpha=ratio,
-                    )
-                    # plotting the airplanes
-                    self.ax.plot(x, y,
-                        solid_joinstyle='round',
-                        solid_capstyle='round',
-                        linewidth=ratio*self.params['airplanes']['size'],
-                        color=self.params['airplanes']['colour'],
-                        zorder=self.params['zorder']['airplanes'],
-                        alpha=ratio,
-                    )
+            self.ax.plot(x, y,
+                solid_joinstyle='round',
+                solid_capstyle='round',
+                linewidth=ratio*self.params['airplanes']['size'],
+                color=self.params['airplanes']['colour'],
+                zorder=self.params['zorder']['airplanes'],
+                alpha=ratio,
+            )
 
     def plot(self, name='map', folder='.', title='', angle=0):
         '''
@@ -1,10 +1,63 @@
+import os.path as osp
 import argparse
 
-from data import MapLoader
-from animate import WorldAnimation
 from config import PARAMS
 
 
+# the rough time of each part of the frames on a single core, in seconds, as measured with 'benchmark.py'
+COSTS = {
+    'angle' : 0.04, # drawing the globe and the airports of a new angle
+    'angle_route' : 1.5e-4, # drawing a flight for a new angle
+    'angle_vertex' : 2e-6, # drawing a vertex of the land for a new angle
+    'frame' : 0.01, # adding the airplanes and the title on a frame
+    'frame_route' : 2e-5, # adding the airplane of a flight on a frame
+    'encode' : 0.008, # encoding a frame
+}
+
+
+def print_plan(kwargs, params=PARAMS):
+    '''
+    Describes the frames to be made and estimates the time to make them,
+    without parsing the data nor importing the libraries drawing the frames.
+    '''
+    from data import MapLoader
+
+    n_frames = kwargs['n_angles']*kwargs['n_rotations']
+    print(f'Number of frames to be made: {n_frames}, '
+        f'{kwargs["n_angles"]} angles for {kwargs["n_rotations"]} rotations')
+    print(f'Video of {n_frames/kwargs["fps"]:.1f}s at {kwargs["fps"]} frames/s, '
+        f'\'{osp.join(kwargs["folder"], kwargs["name"])}\' encoded with {kwargs["codec"]} in {kwargs["chunks"]} chunk(s)')
+    if kwargs['sizes'] is not None:
+        print(f'Videos of {", ".join(str(size) for size in kwargs["sizes"])} pixels, '
+            f'\'{osp.join(kwargs["folder"], kwargs["name"])}_<size>\' made from the same frames')
+    if kwargs['stream']:
+        print('The frames are streamed into the video')
+    else:
+        print(f'The frames are saved in \'{kwargs["frames_dir"]}/\'' + (', reusing the unchanged ones' if kwargs['resume'] else ''))
+    print(f'Frames made by {max(kwargs["workers"], kwargs["chunks"])} process(es)')
+
+    sizes = MapLoader(lazy=True).to_sizes()
+    if sizes is None:
+        print('The data is not parsed yet, the time of the frames cannot be estimated')
+        return
+    print(f'Data: {sizes["routes"]} routes and {sizes["vertices"]} vertices of land')
+
+    # the static layers are drawn once per angle as long as they fit in the cache
+    size = int(params['figure']['size']*params['figure']['dpi'])
+    n_static = kwargs['n_angles']
+    if (not params['figure']['retained']) or (kwargs['n_angles']*4*size**2 > params['figure']['cache_size']*2**20):
+        n_static = n_frames
+    n_static = min(n_static, n_frames)
+    render = n_static*(COSTS['angle'] + COSTS['angle_route']*sizes['routes'] + COSTS['angle_vertex']*sizes['vertices'])
+    render += n_frames*(COSTS['frame'] + COSTS['frame_route']*sizes['routes'])
+    encode = n_frames*COSTS['encode']
+    # the encoding overlaps with the rendering, which is shared between the processes
+    seconds = max(render/max(kwargs['workers'], kwargs['chunks']), encode)
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    print(f'Estimated time: {hours:d}:{minutes:02d}:{seconds:02d} (rough)')
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
 
@@ -31,8 +84,60 @@ if __name__ == '__main__':
         help='the number of rotations of the earth')
     parser.add_argument('--fps', type=int, default=20,
         help='the frames per second of the animation')
+    # performance of the animation
+    parser.add_argument('--workers', type=int, default=1,
+        help='the number of processes making the frames in parallel')
+    parser.add_argument('--stream', type=int, default=1,
+        help='if the frames go directly into the video (0 = saved in frames_dir first; 1 = streamed)')
+    parser.add_argument('--resume', type=int, default=1,
+        help='if the frames already saved in frames_dir are reused when unchanged (0 = all made again; 1 = reused)')
+    # encoding of the video
+    parser.add_argument('--codec', type=str, default='XVID', choices=['XVID', 'MJPG', 'mp4v'],
+        help='the codec of the video (MJPG and XVID are saved as .avi; mp4v as .mp4)')
+    parser.add_argument('--chunks', type=int, default=1,
+        help='the number of segments of the video encoded in parallel and then joined (only with MJPG)')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[],
+        help='the sizes of the videos in pixels, all made from a single rendering of the frames (empty = only the size of config.py)')
+    # telemetry of the animation
+    parser.add_argument('--progress', type=int, default=1,
+        help='if the frames per second and remaining time are shown while making the animation (0 = hidden; 1 = shown)')
+    parser.add_argument('--trace', type=str, default='',
+        help='the file where to write the time of each stage (Chrome trace format if it ends with .json; JSON lines otherwise)')
+    parser.add_argument('--profile_every', type=int, default=0,
+        help='profiles one frame out of this number with cProfile (0 = no profiling)')
+    parser.add_argument('--profile_file', type=str, default='',
+        help='the file where to write the statistics of the profiled frames (printed if empty)')
+
+    # checking the animation before making it
+    parser.add_argument('--dry_run', action='store_true',
+        help='only describes the frames to be made and estimates their time, without making them')
 
     kwargs = vars(parser.parse_args())
+    kwargs['sizes'] = kwargs['sizes'] or None
+    if (kwargs['sizes'] is not None) & (not kwargs['stream']):
+        parser.error('--sizes needs --stream 1, the videos of several sizes are made from the streamed frames')
+    if (kwargs['n_angles'] < 1) | (kwargs['n_rotations'] < 1):
+        parser.error('--n_angles and --n_rotations should be at least 1, otherwise there is no frame to make')
+    if (kwargs['chunks'] > 1) & (kwargs['codec'] != 'MJPG'):
+        parser.error('--chunks above 1 needs --codec MJPG, the other codecs give another video when encoded in chunks')
+    if kwargs.pop('dry_run'):
+        print_plan(kwargs)
+        raise SystemExit
+
+    # the libraries drawing and encoding the frames are only imported once needed
+    from data import MapLoader
+    from animate import WorldAnimation
+    from telemetry import Telemetry
+
+    telemetry_kwargs = {key : kwargs.pop(key) for key in ['progress', 'trace', 'profile_every', 'profile_file']}
+    if telemetry_kwargs['progress'] or telemetry_kwargs['trace'] or telemetry_kwargs['profile_every']:
+        kwargs['telemetry'] = Telemetry(
+            trace_file=telemetry_kwargs['trace'],
+            profile_every=telemetry_kwargs['profile_every'],
+            profile_file=telemetry_kwargs['profile_file'],
+            live=bool(telemetry_kwargs['progress']),
+        )
+
     loader = MapLoader()
     Anim = WorldAnimation(
         shapes=loader.to_shapes(),
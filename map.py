@@ -2,7 +2,11 @@ import os
 import os.path as osp
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.patches import Circle, Polygon, Rectangle
+from matplotlib.patches import Circle, PathPatch, Rectangle
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.path import Path
+from matplotlib.text import Text
+from matplotlib.transforms import Affine2D
 
 from config import PARAMS
 
@@ -25,11 +29,33 @@ class WorldMap(object):
         ##  ]                                                                          ##
         ##                                                                             ##
         #################################################################################
+
+        Each shape is a ring going clockwise, except for the holes of the rings around them, which go counter-clockwise.
         '''
         self.shapes = shapes
         self.params = params
 
-        self.globe = None # a globe useful to clip the figures
+        # all the shapes stored as a single array of 3D points, split by 'shape_offsets'
+        shape_coords, self.shape_offsets = self.to_ragged(shapes)
+        self.shape_xyz = self.coord_to_xyz(shape_coords)
+        self.shape_ids = np.repeat(np.arange(len(shapes)), np.diff(self.shape_offsets)) # the shape of each point
+        self.shape_clockwise = self.to_clockwise(shape_coords, self.shape_ids, len(shapes))
+        self.shape_importance = self.to_importance(self.shape_xyz, self.shape_offsets) # the level of detail of each point
+
+        self.globe = None # the circle of the globe
+        self.artists = {} # the layers of the figure, by name
+
+    def __getstate__(self):
+        '''
+        Drops the figure when pickling, for instance to send the map to other processes.
+        '''
+        state = self.__dict__.copy()
+        for key in ['fig', 'ax']:
+            state.pop(key, None)
+        state['globe'] = None
+        state['artists'] = {}
+
+        return state
 
     @staticmethod
     def normalize_angle(angle):
@@ -47,45 +73,351 @@ class WorldMap(object):
         return angle
 
     @staticmethod
-    def project(coord, angle=0, turn=0, flip=False, r=1, away=10):
-        '''
-        Projects the coordinates on the 3D map.
-        'turn' is useful for coordinates partly at the left/right end of the other side of the globe.
-        'away' is useful to avoid having non-desired lines on the map.
-        '''
-        x, y = coord
-        y = y*np.pi/180
-        x = x - angle + turn*360
-        unseen = False # if the coordinates are on the other side of the globe
-
-        pos_x = r*np.sin(x*np.pi/180)*np.cos(y)
-        pos_y = r*np.sin(y)
-        d = pos_x**2 + pos_y**2
-
-        if (x > 90) & (d <= 1):
-            pos_x = away*r*np.cos(y)
-            pos_y *= away
-            unseen = True
-        elif (x < -90) & (d <= 1):
-            pos_x = - away*r*np.cos(y)
-            pos_y *= away
-            unseen = True
+    def to_ragged(arrays):
+        '''
+        Stacks a list of arrays of coordinates into a single array.
+        The array 'offsets' is such that the i-th array is 'coords[offsets[i]:offsets[i+1]]'.
+        '''
+        lengths = [len(array) for array in arrays]
+        offsets = np.concatenate([[0], np.cumsum(lengths, dtype=int)]).astype(int)
+
+        if arrays:
+            coords = np.concatenate([np.reshape(np.asarray(array, dtype=float), (-1, 2)) for array in arrays])
+        else:
+            coords = np.zeros((0, 2))
+
+        return coords, offsets
+
+    @staticmethod
+    def coord_to_xyz(coord):
+        '''
+        Transforms coordinates into a 3D point.
+        '''
+        coord = np.reshape(np.asarray(coord, dtype=float), (-1, 2))
+        longitude, latitude = coord[:,0]*np.pi/180, coord[:,1]*np.pi/180
+        x = np.cos(longitude)*np.cos(latitude)
+        y = np.sin(longitude)*np.cos(latitude)
+        z = np.sin(latitude)
+
+        return np.stack([x,y,z], axis=1)
+
+    @staticmethod
+    def to_clockwise(coords, ids, n_shapes):
+        '''
+        Checks which shapes go clockwise, which tells on which side of their border the land is.
+        '''
+        if not len(coords):
+            return np.zeros(n_shapes, dtype=bool)
+
+        # the next point of each shape, going back to the first point at the end
+        next_index = np.arange(len(coords)) + 1
+        starts = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]]))
+        ends = np.concatenate([starts[1:], [len(coords)]])
+        next_index[ends - 1] = starts
+        areas = coords[:,0]*coords[next_index,1] - coords[next_index,0]*coords[:,1]
+
+        return np.bincount(ids, weights=areas, minlength=n_shapes) < 0
+
+    @staticmethod
+    def to_ranges(firsts, lengths):
+        '''
+        Returns the indices of all the ranges starting at 'firsts' with the given lengths, one range after the other.
+        '''
+        bounds = np.cumsum(lengths) - lengths
+
+        return np.repeat(firsts - bounds, lengths) + np.arange(np.sum(lengths, dtype=int))
+
+    @staticmethod
+    def to_argmax(values, lengths):
+        '''
+        Finds the first largest value of each of the consecutive parts of 'values' with the given lengths, which are positive.
+        Returns the position of the largest value in each part, and the largest value.
+        '''
+        bounds = np.cumsum(lengths) - lengths
+        maxima = np.maximum.reduceat(values, bounds)
+        parts = np.repeat(np.arange(len(lengths)), lengths)
+        hits = np.flatnonzero(values == maxima[parts])
+        _, first_hits = np.unique(parts[hits], return_index=True)
+
+        return hits[first_hits] - bounds, maxima
+
+    @staticmethod
+    def to_importance(xyz, offsets):
+        '''
+        Simplifies each ring of 3D points with the Douglas-Peucker algorithm and returns the importance of each point.
+        The ring simplified with a tolerance 'tol' is made of the points with importance at least 'tol',
+        so that all the levels of detail are given by a single array.
+        The first point of each ring and the point the farthest from it are always kept.
+        The parts of all the rings are split at once, one level of the recursion at a time.
+        '''
+        importance = np.zeros(len(xyz))
+        starts, ends = offsets[:-1], offsets[1:]
+        small = ends - starts <= 3
+        importance[np.repeat(small, ends - starts)] = np.inf
+        starts, ends = starts[~small], ends[~small]
+        if not len(starts):
+            return importance
+
+        points = WorldMap.to_ranges(starts, ends - starts)
+        far, _ = WorldMap.to_argmax(np.sum((xyz[points] - np.repeat(xyz[starts], ends - starts, axis=0))**2, axis=1), ends - starts)
+        far += starts
+        importance[starts] = np.inf
+        importance[far] = np.inf
+
+        # each part of a ring is given by its first and last indices, and by the point closing it,
+        # which is the first point of the ring for the last part
+        firsts = np.concatenate([starts, far])
+        lasts = np.concatenate([far, ends])
+        closing = np.concatenate([far, starts])
+        bounds = np.full(len(firsts), np.inf)
+        while len(firsts):
+            split = lasts - firsts >= 2
+            firsts, lasts, closing, bounds = firsts[split], lasts[split], closing[split], bounds[split]
+            if not len(firsts):
+                break
+
+            lengths = lasts - firsts - 1
+            a = np.repeat(xyz[firsts], lengths, axis=0)
+            ab = np.repeat(xyz[closing] - xyz[firsts], lengths, axis=0)
+            points = xyz[WorldMap.to_ranges(firsts + 1, lengths)] - a
+            t = np.clip(np.sum(points*ab, axis=1)/np.maximum(np.sum(ab**2, axis=1), 1e-300), 0, 1)
+            distances = np.sum((points - np.reshape(t, (-1, 1))*ab)**2, axis=1)**.5
+
+            middles, maxima = WorldMap.to_argmax(distances, lengths)
+            middles += firsts + 1
+            # a point is never more important than the points splitting its part
+            importance[middles] = np.minimum(maxima, bounds)
+
+            firsts, lasts, closing = np.concatenate([firsts, middles]), np.concatenate([middles, lasts]), np.concatenate([middles, closing])
+            bounds = np.concatenate([importance[middles]]*2)
+
+        return importance
+
+    def to_pixel(self):
+        '''
+        Returns the size of a pixel of the figure, in units of the figure.
+        '''
+        return 2*(1 + self.params['figure']['extra_space'])/(self.params['figure']['size']*self.params['figure']['dpi'])
+
+    def to_tolerance(self):
+        '''
+        Returns the largest error allowed when simplifying the geometry, in units of the figure, given its size and resolution.
+        '''
+        return self.params['figure']['lod']*self.to_pixel()
+
+    @staticmethod
+    def rotation(angle=0, flip=False):
+        '''
+        Returns the rotation matrix sending 3D points to the view from 'angle'.
+        The first two coordinates are the position on the figure and the last one is the depth towards the viewer.
+        '''
+        angle = angle*np.pi/180
+        matrix = np.array([
+            [- np.sin(angle), np.cos(angle), 0],
+            [0, 0, 1],
+            [np.cos(angle), np.sin(angle), 0],
+        ])
 
         if flip:
-            pos_x = - pos_x
+            matrix[0,:] = - matrix[0,:]
+
+        return matrix
+
+    def project(self, xyz, angle=0, flip=False, r=1):
+        '''
+        Projects the 3D points on the globe as viewed from 'angle', with a single rotation.
+        'r' is either a number or an array with one radius per point.
+        Returns the array of projected points and the boolean array of the visible points,
+        which are either on the front side of the globe or above its horizon.
+        '''
+        rotated = xyz @ self.rotation(angle, flip).T
+        points = np.reshape(r, (-1, 1))*rotated[:,:2]
+        visible = (rotated[:,2] >= 0) | (np.sum(points**2, axis=1) > 1)
+
+        return points, visible
+
+    def to_polygons(self, angle=0, flip=False, margin=0, tolerance=0):
+        '''
+        Projects all the shapes and returns the polygons that are at least partly visible, with their visible borders.
+        The shapes are cut at the horizon of the globe in 3D, so that only their visible pieces are returned.
+        The borders are cut 'margin' away from the horizon.
+        The shapes are simplified up to an error of 'tolerance', which grows near the horizon where the globe is foreshortened.
+        '''
+        rotated = self.shape_xyz @ self.rotation(angle, flip).T
+        border_depth = (1 - (1 - margin)**2)**.5 # the depth at which the globe has radius '1 - margin'
+
+        kept = np.ones(len(rotated), dtype=bool)
+        if tolerance > 0:
+            # the surface of the globe shrinks by its depth, so its lengths shrink on average by the square root of the depth
+            foreshortening = np.maximum(np.abs(rotated[:,2]), self.params['figure']['lod_limb'])**.5
+            kept = self.shape_importance*foreshortening >= tolerance
+
+        polygons = []
+        borders = []
+        for start, end, clockwise in zip(self.shape_offsets[:-1], self.shape_offsets[1:], self.shape_clockwise):
+            ring = rotated[start:end][kept[start:end]]
+            if np.all(ring[:,2] < 0):
+                continue
+
+            runs, closed = self.clip_ring(ring)
+            if closed:
+                polygons.append(runs[0])
+            else:
+                polygons += self.join_runs(runs, clockwise ^ flip)
+
+            runs, closed = self.clip_ring(ring, border_depth)
+            if closed:
+                # going over the first edge again to join the border with itself
+                borders.append(np.concatenate([runs[0], runs[0][:2]]))
+            else:
+                borders += runs
+
+        return polygons, borders
+
+    @staticmethod
+    def clip_ring(rotated, depth=0):
+        '''
+        Cuts a rotated ring of points at 'depth', in 3D.
+        Returns the runs of projected points in front of 'depth', each starting and ending where the ring is cut,
+        and whether the whole ring is in front, in which case it is returned as the only run.
+        '''
+        visible = rotated[:,2] >= depth
+        if np.all(visible):
+            return [rotated[:,:2]], True
+        if not np.any(visible):
+            return [], False
+
+        # starting the ring right after it comes back in front
+        next_visible = np.roll(visible, -1)
+        start = (np.flatnonzero(~visible & next_visible)[0] + 1) % len(visible)
+        rotated = np.roll(rotated, -start, axis=0)
+        visible = np.roll(visible, -start)
+        next_visible = np.roll(visible, -1)
+
+        exits = np.flatnonzero(visible & ~next_visible) # the last point in front before going behind
+        entries = np.flatnonzero(~visible & next_visible) # the last point behind before coming back in front
+
+        # the points where the edges are cut, brought back on the globe
+        crossings = []
+        for edges in [exits, entries]:
+            a, b = rotated[edges], rotated[(edges + 1) % len(rotated)]
+            t = np.reshape((a[:,2] - depth)/(a[:,2] - b[:,2]), (-1, 1))
+            points = a + t*(b - a)
+            points /= np.reshape(np.sum(points**2, axis=1)**.5, (-1, 1))
+            crossings.append(points[:,:2])
+        exit_points, entry_points = crossings
+
+        runs = []
+        previous = -1
+        for k, (exit, entry) in enumerate(zip(exits, entries)):
+            runs.append(np.concatenate([entry_points[k - 1:k], rotated[previous + 1:exit + 1,:2], exit_points[k:k + 1]]))
+            previous = entry
+
+        # the first run starts where the ring comes back in front for the last time
+        runs[0] = np.concatenate([entry_points[-1:], runs[0]])
+
+        return runs, False
+
+    def join_runs(self, runs, clockwise=True):
+        '''
+        Joins the visible runs of a cut ring into polygons, by following the horizon from each exit to the next entry.
+        The horizon is followed in the same direction as the ring, so that the land stays on the same side.
+        A ring can be cut into several polygons, as its visible pieces are not always joined in the order of the ring.
+        '''
+        entry_angles = np.array([np.arctan2(run[0,1], run[0,0]) for run in runs])
+        exit_angles = np.array([np.arctan2(run[-1,1], run[-1,0]) for run in runs])
+        if clockwise:
+            sweeps = (exit_angles[:,None] - entry_angles[None,:]) % (2*np.pi)
+        else:
+            sweeps = (entry_angles[None,:] - exit_angles[:,None]) % (2*np.pi)
+        following = np.argmin(sweeps, axis=1) # the run met first along the horizon after each exit
+
+        polygons = []
+        joined = np.zeros(len(runs), dtype=bool)
+        for first in range(len(runs)):
+            pieces = []
+            k = first
+            while not joined[k]:
+                joined[k] = True
+                pieces += [runs[k], self.to_horizon(runs[k][-1], runs[following[k]][0], clockwise)]
+                k = following[k]
+            if pieces:
+                polygons.append(np.concatenate(pieces))
+
+        return polygons
+
+    @staticmethod
+    def to_compound(polygons):
+        '''
+        Joins the polygons into a single path, filled with the nonzero rule of matplotlib.
+        The polygons of the holes go the other way around than the polygons of the rings around them,
+        so they are not filled.
+        '''
+        polygons = [points for points in polygons if len(points) > 2]
+        if not polygons:
+            return Path(np.zeros((0, 2)))
 
-        return (pos_x, pos_y), unseen
+        vertices = np.concatenate([np.concatenate([points, points[:1]]) for points in polygons])
+        codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+        ends = np.cumsum([len(points) + 1 for points in polygons])
+        codes[ends - 1] = Path.CLOSEPOLY
+        codes[np.concatenate([[0], ends[:-1]])] = Path.MOVETO
+
+        return Path(vertices, codes)
+
+    def to_horizon(self, start, end, clockwise=True):
+        '''
+        Returns the points of the horizon strictly between 'start' and 'end', turning clockwise or not.
+        '''
+        start_angle = np.arctan2(start[1], start[0])
+        end_angle = np.arctan2(end[1], end[0])
+        if clockwise:
+            sweep = - ((start_angle - end_angle) % (2*np.pi))
+        else:
+            sweep = (end_angle - start_angle) % (2*np.pi)
+
+        n_steps = max(int(np.ceil(np.abs(sweep)*180/np.pi/self.params['globe']['horizon_step'])), 1)
+        angles = start_angle + sweep*np.arange(1, n_steps)/n_steps
+
+        return np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    @staticmethod
+    def to_segments(points, visible, ids):
+        '''
+        Splits the points into segments of consecutive visible points sharing the same id.
+        Returns the list of segments and the id of each segment.
+        '''
+        new = np.ones(len(ids), dtype=bool)
+        new[1:] = ids[1:] != ids[:-1]
+        runs = np.cumsum(new | ~visible)[visible]
+        points = points[visible]
+        ids = ids[visible]
+
+        if not len(runs):
+            return [], ids
+
+        cuts = np.flatnonzero(np.diff(runs)) + 1
+
+        return np.split(points, cuts), ids[np.concatenate([[0], cuts])]
 
     def set_figure(self):
         '''
         Resets the figure.
+        When the figure is retained, the same figure and layers are kept and only hidden until they are updated.
         '''
+        if self.is_retained() & hasattr(self, 'fig'):
+            for artist in self.artists.values():
+                artist.set_visible(False)
+            return
+
         if hasattr(self, 'fig'):
             plt.close('all')
+        self.artists = {}
 
         # creating the general figure
-        self.fig, self.ax = plt.subplots(figsize=[self.params['figure']['size']]*2)
+        self.fig, self.ax = plt.subplots(figsize=[self.params['figure']['size']]*2, dpi=self.params['figure']['dpi'])
         self.fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
+        self.fig.patch.set_alpha(0) # transparent, as when the figure is saved
         self.ax.set_axis_off()
         extra = 1 + self.params['figure']['extra_space']
         self.ax.set_xlim(-extra, extra)
@@ -100,72 +432,135 @@ class WorldMap(object):
                 zorder=self.params['zorder']['background']
             ))
 
+    def is_retained(self):
+        '''
+        Checks if the figure and its layers are kept from one frame to the next.
+        '''
+        return self.params['figure']['collections'] & self.params['figure']['retained']
+
+    def to_layer(self, name, make):
+        '''
+        Returns the artist drawing the layer 'name', made with 'make' and added to the figure if it does not exist yet.
+        '''
+        if name not in self.artists:
+            self.artists[name] = make()
+            self.ax.add_artist(self.artists[name])
+
+        artist = self.artists[name]
+        artist.set_visible(True)
+
+        return artist
+
     def plot_globe(self, angle=0):
         '''
         Plots the globe and its shade as viewed from 'angle'.
         '''
         angle = self.normalize_angle(angle)
 
-        self.globe = Circle(
+        self.globe = self.to_layer('globe', lambda: Circle(
             xy=(0, 0),
             radius=1,
             color=self.params['globe']['water_colour'],
             zorder=self.params['zorder']['water'],
             lw=0,
-        )
-        self.ax.add_patch(self.globe)
-
-        for shape in self.shapes:
-            for turn in [-1, 0, 1]: # to cover for the boundary problems
-                points, unseen = zip(*[self.project(point, angle, turn) for point in shape])
-                if not all(unseen):
-                    # the border of the land
-                    self.ax.add_patch(Polygon(
-                        xy=points,
-                        color=self.params['globe']['border_colour'],
-                        zorder=self.params['zorder']['land_border'],
-                        lw=self.params['globe']['border'],
-                        clip_path=self.globe,
-                        joinstyle='round',
-                    ))
-                    # the main land
-                    self.ax.add_patch(Polygon(
-                        xy=points,
-                        color=self.params['globe']['land_colour'],
-                        zorder=self.params['zorder']['land'],
-                        lw=0,
-                        clip_path=self.globe,
-                    ))
+        ))
+
+        polygons, borders = self.to_polygons(angle, margin=self.to_margin(), tolerance=self.to_tolerance())
+
+        if self.params['figure']['collections']:
+            # the border of the land
+            border_layer = self.to_layer('land_border', lambda: LineCollection(
+                [],
+                colors=self.params['globe']['border_colour'],
+                zorder=self.params['zorder']['land_border'],
+                linewidths=self.params['globe']['border'],
+                joinstyle='round',
+                capstyle='butt',
+            ))
+            border_layer.set_segments(borders)
+            # the main land, as a single path where the holes are left out
+            path = self.to_compound(polygons)
+            self.to_layer('land', lambda: PolyCollection(
+                [],
+                facecolors=self.params['globe']['land_colour'],
+                edgecolors='none',
+                zorder=self.params['zorder']['land'],
+                linewidths=0,
+            )).set_verts_and_codes([path.vertices], [path.codes])
+
+        else:
+            for points in borders:
+                # the border of the land
+                self.ax.plot(points[:,0], points[:,1],
+                    solid_joinstyle='round',
+                    solid_capstyle='butt',
+                    color=self.params['globe']['border_colour'],
+                    zorder=self.params['zorder']['land_border'],
+                    lw=self.params['globe']['border'],
+                )
+            # the main land
+            self.ax.add_patch(PathPatch(
+                self.to_compound(polygons),
+                color=self.params['globe']['land_colour'],
+                zorder=self.params['zorder']['land'],
+                lw=0,
+            ))
 
         # plotting the shade
         self.plot_shade(angle)
 
+    def to_margin(self):
+        '''
+        Returns half the width of the borders of the land, in units of the figure.
+        The borders stop this far away from the horizon, to stay inside the globe.
+        '''
+        return self.params['globe']['border']*(1 + self.params['figure']['extra_space'])/(72*self.params['figure']['size'])
+
+    def to_shade_matrix(self, matrix):
+        '''
+        Returns the matrix of the transformation drawing the shade, given the matrix sending the figure to the display.
+        The shade is squeezed, rotated, and moved below the globe.
+        '''
+        x_scale, y_scale = matrix[0,0], matrix[1,1]
+        x_shift, y_shift = matrix[0,2], matrix[1,2]
+
+        rotation = self.params['shade']['rotation']*np.pi/180
+        shade = np.array([
+            [np.cos(rotation), - np.sin(rotation), 0],
+            [np.sin(rotation), np.cos(rotation), 0],
+            [0, 0, 1],
+        ]) @ np.diag([
+            self.params['shade']['ratio']*self.params['shade']['scale']*x_scale,
+            self.params['shade']['scale']*y_scale,
+            1,
+        ])
+        shade[0,2] = x_shift + x_scale*self.params['shade']['x_pos']
+        shade[1,2] = y_shift - y_scale + y_scale*self.params['shade']['y_pos']
+
+        return shade
+
+    def to_shade_polygons(self, angle=0):
+        '''
+        Returns the polygons of the shade at 'angle', already shifted to the angle of the shade.
+        '''
+        # the shade is drawn smaller, which allows a coarser level of detail
+        shade_scale = self.params['shade']['scale']*max(self.params['shade']['ratio'], 1)
+        polygons, _ = self.to_polygons(angle, flip=True, tolerance=self.to_tolerance()/shade_scale)
+
+        return polygons
+
     def plot_shade(self, angle=0):
         '''
         Plots the shaded version of the globe.
         '''
         angle = self.normalize_angle(angle + self.params['shade']['angle'])
 
-        # general transformation applied on the shade
-        transform = self.ax.transData.get_affine()
-        x_shift = transform.get_matrix()[0,2]
-        y_shift = transform.get_matrix()[1,2]
-        x_scale = transform.get_matrix()[0,0]
-        y_scale = transform.get_matrix()[1,1]
-
-        transform.set_matrix(np.diag(np.diag(transform.get_matrix()))) # only keep the diagonal
-        transform.scale(
-            self.params['shade']['ratio']*self.params['shade']['scale'],
-            self.params['shade']['scale']
-        )
-        transform.rotate_deg(self.params['shade']['rotation'])
-        transform.translate(
-            x_shift + x_scale*self.params['shade']['x_pos'],
-            y_shift - y_scale + y_scale*self.params['shade']['y_pos']
-        )
+        # general transformation applied on the shade, before sending it to the display
+        # the axes have the same scale on both directions, so the shade follows any change of dpi of the figure
+        transform = Affine2D(self.to_shade_matrix(np.eye(3))) + self.ax.transData
 
         # plotting the shaded world sphere
-        self.ax.add_patch(Circle(
+        self.to_layer('shade_water', lambda: Circle(
             xy=(0, 0),
             radius=1,
             color=self.params['shade']['water_colour'],
@@ -174,29 +569,33 @@ class WorldMap(object):
             transform=transform,
             lw=0,
         ))
-        for shape in self.shapes:
-            for turn in [-1, 0, 1]: # to cover for the boundary problems
-                points, unseen = zip(*[self.project(point, angle, turn, flip=True, away=1) for point in shape])
-                if not all(unseen):
-                    self.ax.add_patch(Polygon(
-                        xy=points,
-                        color=self.params['shade']['land_colour'],
-                        zorder=self.params['zorder']['shade_land'],
-                        alpha=self.params['shade']['alpha'],
-                        transform=transform,
-                        lw=0,
-                    ))
+        path = self.to_compound(self.to_shade_polygons(angle))
+
+        if self.params['figure']['collections']:
+            self.to_layer('shade_land', lambda: PolyCollection(
+                [],
+                facecolors=self.params['shade']['land_colour'],
+                edgecolors='none',
+                zorder=self.params['zorder']['shade_land'],
+                alpha=self.params['shade']['alpha'],
+                transform=transform,
+                linewidths=0,
+            )).set_verts_and_codes([path.vertices], [path.codes])
+
+        else:
+            self.ax.add_patch(PathPatch(
+                path,
+                color=self.params['shade']['land_colour'],
+                zorder=self.params['zorder']['shade_land'],
+                alpha=self.params['shade']['alpha'],
+                transform=transform,
+                lw=0,
+            ))
 
-    def savefig(self, name='map', folder='.', title=''):
+    def add_title(self, title=''):
         '''
-        Saves the current state of the figure.
+        Adds a title to the figure when available.
         '''
-        assert hasattr(self, 'fig')
-
-        if not osp.exists(folder):
-            os.makedirs(folder)
-
-        # adds a title when available
         if title:
             bbox = {
                 'boxstyle' : 'round',
@@ -204,7 +603,7 @@ class WorldMap(object):
                 'facecolor' : self.params['text']['background'],
                 'linewidth' : self.params['text']['border'],
             }
-            self.ax.text(
+            self.to_layer('title', lambda: Text(
                 - 1 - self.params['figure']['extra_space'] + self.params['text']['x'],
                 - 1 - self.params['figure']['extra_space'] + self.params['text']['y'],
                 title,
@@ -212,10 +611,39 @@ class WorldMap(object):
                 color=self.params['text']['colour'],
                 #fontweight='demibold',
                 bbox=bbox,
-            )
+            )).set_text(title)
 
+    def savefig(self, name='map', folder='.', title=''):
+        '''
+        Saves the current state of the figure.
+        '''
+        assert hasattr(self, 'fig')
+
+        if not osp.exists(folder):
+            os.makedirs(folder)
+
+        self.add_title(title)
         self.fig.savefig(osp.join(folder, name + '.png'), transparent=True)
 
+    def to_image(self, title=''):
+        '''
+        Draws the current state of the figure and returns it as a BGR image, without going through the disk.
+        '''
+        assert hasattr(self, 'fig')
+
+        self.add_title(title)
+        self.fig.canvas.draw()
+
+        return self.to_buffer()
+
+    def to_buffer(self):
+        '''
+        Returns the current content of the canvas as a BGR image, without drawing it again.
+        '''
+        image = np.asarray(self.fig.canvas.buffer_rgba())
+
+        return np.ascontiguousarray(image[:,:,2::-1]) # from RGBA to BGR
+
     def plot(self, name='map', folder='.', title='', angle=0):
         '''
         Plots the world globe.
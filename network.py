@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class Airports(object):
+
+    def __init__(self, names=[], coords=[], ratios=[]):
+        '''
+        The 'Airports' class stores the airports as arrays, the i-th airport being identified by the integer 'i'.
+        It holds the 'names', the 'coords' (longitude and latitude in degree), and the 'ratios' of all the airports.
+        '''
+        self.names = np.asarray(names, dtype=str)
+        self.coords = np.reshape(np.asarray(coords, dtype=float), (-1, 2))
+        self.ratios = np.asarray(ratios, dtype=float)
+        assert len(self.names) == len(self.coords) == len(self.ratios)
+
+    def __len__(self):
+        '''
+        Returns the number of airports.
+        '''
+        return len(self.names)
+
+    @staticmethod
+    def from_dict(airports):
+        '''
+        Transforms the dictionary of airports, as described in 'WorldFlights', into arrays.
+        '''
+        return Airports(
+            names=list(airports),
+            coords=[airport_info['coord'] for airport_info in airports.values()],
+            ratios=[airport_info['ratio'] for airport_info in airports.values()],
+        )
+
+    def to_ids(self, names):
+        '''
+        Returns the identifier of each of the airports 'names'.
+        '''
+        index = {name : i for i, name in enumerate(self.names.tolist())}
+
+        return np.array([index[name] for name in names], dtype=int)
+
+    def to_dict(self):
+        '''
+        Transforms the arrays back into the dictionary of airports.
+        '''
+        return {
+            name : {'coord' : tuple(coord), 'ratio' : ratio}
+            for name, coord, ratio in zip(self.names.tolist(), self.coords.tolist(), self.ratios.tolist())
+        }
+
+
+class Flights(object):
+
+    def __init__(self, pairs=[], ratios=[], departures=[], departure_offsets=None, durations=None):
+        '''
+        The 'Flights' class stores the flights as arrays, each flight going between two airports of an 'Airports' object.
+        It holds the 'pairs' of airport identifiers and the 'ratios' of all the flights.
+        The schedule is given by a single array of 'departures' (in hours),
+        where the departures of the i-th flight are 'departures[departure_offsets[i]:departure_offsets[i+1]]',
+        and by the 'durations' of the flights (in hours).
+        Without 'departure_offsets', the flights are not scheduled.
+        '''
+        self.pairs = np.reshape(np.asarray(pairs, dtype=int), (-1, 2))
+        self.ratios = np.asarray(ratios, dtype=float)
+        self.departures = np.asarray(departures, dtype=float)
+        if departure_offsets is None:
+            departure_offsets = np.zeros(len(self.pairs) + 1)
+        self.departure_offsets = np.asarray(departure_offsets, dtype=int)
+        if durations is None:
+            durations = np.zeros(len(self.pairs))
+        self.durations = np.asarray(durations, dtype=float)
+        assert len(self.pairs) == len(self.ratios) == len(self.durations) == len(self.departure_offsets) - 1
+        assert len(self.departures) == self.departure_offsets[-1]
+
+    def __len__(self):
+        '''
+        Returns the number of flights.
+        '''
+        return len(self.pairs)
+
+    @staticmethod
+    def from_dict(flights, airports):
+        '''
+        Transforms the dictionary of flights, as described in 'WorldFlights', into arrays.
+        The names of the airports are matched with the 'Airports' object 'airports'.
+        Either all the flights or none of them follow a schedule, as the airplanes are placed in only one way.
+        '''
+        scheduled = ['departures' in infos for infos in flights.values()]
+        if any(scheduled) & (not all(scheduled)):
+            raise ValueError(
+                f'Only {sum(scheduled)} of the {len(scheduled)} flights have \'departures\', '
+                'either all the flights or none of them should follow a schedule'
+            )
+        departures = [infos.get('departures', []) for infos in flights.values()]
+
+        return Flights(
+            pairs=np.reshape(airports.to_ids([name for pair in flights for name in pair]), (-1, 2)),
+            ratios=[infos['ratio'] for infos in flights.values()],
+            departures=[departure for flight_departures in departures for departure in flight_departures],
+            departure_offsets=np.cumsum([0] + [len(flight_departures) for flight_departures in departures]),
+            durations=[infos.get('duration', 0) for infos in flights.values()],
+        )
+
+    def to_dict(self, airports):
+        '''
+        Transforms the arrays back into the dictionary of flights, naming the airports with 'airports'.
+        '''
+        names = airports.names.tolist()
+        scheduled = len(self.departures) > 0
+        flights = {}
+        for flight, ((a1, a2), ratio) in enumerate(zip(self.pairs.tolist(), self.ratios.tolist())):
+            flights[names[a1], names[a2]] = {'ratio' : ratio}
+            start, end = self.departure_offsets[flight:flight + 2]
+            if scheduled:
+                flights[names[a1], names[a2]]['departures'] = self.departures[start:end].tolist()
+                flights[names[a1], names[a2]]['duration'] = self.durations[flight]
+
+        return flights
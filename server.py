@@ -0,0 +1,288 @@
+import json
+import math
+import argparse
+import threading
+from collections import OrderedDict
+from multiprocessing import Pool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from cache import LRUCache
+from config import PARAMS
+
+
+# the animation loaded once by each worker process, and its copies at other sizes from the least recently used
+WORKER_ANIMATIONS = OrderedDict()
+
+
+# the number of copies of the animation at other sizes kept by each worker process
+MAX_SIZED = 4
+
+
+# the sizes of the frames that can be requested, in pixels
+MIN_SIZE = 16
+MAX_SIZE = 4096
+
+
+def init_server_worker(animation):
+    '''
+    Stores the animation in the worker process.
+    '''
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend('Agg') # the frames are only rendered in memory
+    WORKER_ANIMATIONS.clear()
+    WORKER_ANIMATIONS[None] = animation
+
+
+def render_worker_png(request):
+    '''
+    Renders a frame in the worker process and sends it back encoded as PNG.
+    '''
+    import cv2
+
+    angle, airplanes_index, title, plot_airports, plot_flights, plot_airplanes, size = request
+    image = to_worker_animation(size).render_frame(angle, airplanes_index, title, plot_airports, plot_flights, plot_airplanes)
+
+    return cv2.imencode('.png', image)[1].tobytes()
+
+
+def to_worker_animation(size):
+    '''
+    Returns the animation of the worker process making frames of 'size' pixels.
+    Each copy at another size has its own figure and cache, as the cached layers are only valid for the figure drawing them,
+    and only the 'MAX_SIZED' most recently used copies are kept, with their caches.
+    '''
+    import matplotlib.pyplot as plt
+
+    if size not in WORKER_ANIMATIONS:
+        animation = WORKER_ANIMATIONS[None].to_size(size)
+        WORKER_ANIMATIONS[size] = animation
+
+        if len(WORKER_ANIMATIONS) > MAX_SIZED + 1:
+            oldest = next(key for key in WORKER_ANIMATIONS if key is not None)
+            animation = WORKER_ANIMATIONS.pop(oldest)
+            if hasattr(animation, 'fig'):
+                plt.close(animation.fig)
+
+    WORKER_ANIMATIONS.move_to_end(size)
+
+    return WORKER_ANIMATIONS[size]
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    '''
+    Answers the requests of the render server:
+    '/frame' returns a frame as PNG, and '/stats' returns the state of the caches as JSON.
+    '''
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/frame':
+            try:
+                request = self.server.render_server.to_request(parse_qs(url.query))
+            except ValueError as error:
+                return self.send(400, 'text/plain', str(error).encode())
+            try:
+                png = self.server.render_server.render(request)
+            except Exception as error:
+                return self.send(500, 'text/plain', f'The frame could not be rendered: {error!r}'.encode())
+            self.send(200, 'image/png', png)
+
+        elif url.path == '/stats':
+            self.send(200, 'application/json', json.dumps(self.server.render_server.to_stats()).encode())
+
+        else:
+            self.send(404, 'text/plain', b'Only \'/frame\' and \'/stats\' are available')
+
+    def send(self, code, content_type, body):
+        '''
+        Sends a response with its body.
+        '''
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.render_server.verbose:
+            super().log_message(format, *args)
+
+
+class RenderServer(object):
+
+    def __init__(self, animation, host='127.0.0.1', port=8000, workers=2, cache_size=256, verbose=False):
+        '''
+        The 'RenderServer' class renders single frames of an animation on demand, over HTTP.
+        The data and the paths of the flights are loaded once, and each request renders a frame in memory,
+        given by its angle, its airplanes index, the elements to plot, its title, and its size in pixels.
+        The encoded frames are kept in an LRU cache of 'cache_size' MB, and the static layers of each angle
+        are cached by the animation itself and by each of its copies at other sizes, in each worker.
+        The frames are rendered by a pool of 'workers' processes, such that concurrent requests do not wait for each other,
+        or in the server process under a lock if 'workers' is 0.
+        '''
+        self.animation = animation
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.verbose = verbose
+
+        self.frames = LRUCache(cache_size*2**20) # the PNG bytes of the frames, by request
+        self.pending = {} # the requests being rendered, shared by the threads asking for the same frame
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock() # matplotlib renders one frame at a time in the server process
+        self.n_requests = 0
+        self.n_hits = 0
+
+        self.pool = Pool(workers, initializer=init_server_worker, initargs=(animation,)) if workers > 0 else None
+        if self.pool is None:
+            init_server_worker(animation)
+
+    def to_request(self, query):
+        '''
+        Reads a request from the parameters of the query, with the default values of the animation otherwise.
+        Raises a ValueError if a parameter is not valid.
+        '''
+        def read(name, cast, default):
+            if name not in query:
+                return default
+            try:
+                return cast(query[name][-1])
+            except ValueError:
+                raise ValueError(f'The parameter \'{name}\' is not valid')
+
+        angle = read('angle', float, 0.)
+        if not math.isfinite(angle):
+            raise ValueError('The angle should be a finite number of degrees')
+
+        size = read('size', int, None)
+        if (size is not None) and not (MIN_SIZE <= size <= MAX_SIZE):
+            raise ValueError(f'The size should be between {MIN_SIZE} and {MAX_SIZE} pixels')
+        if size == int(round(self.animation.params['figure']['size']*self.animation.params['figure']['dpi'])):
+            size = None # the frames of the animation itself
+
+        return (
+            self.animation.normalize_angle(angle % 360), # the modulo is exact and keeps the angles in [0,360) as they are
+            read('airplanes_index', int, 9*2021),
+            read('title', str, ''),
+            bool(read('airports', int, 1)),
+            bool(read('flights', int, 1)),
+            bool(read('airplanes', int, 1)),
+            size,
+        )
+
+    def render(self, request):
+        '''
+        Returns the frame of the request encoded as PNG, from the cache if it was already rendered.
+        '''
+        with self.lock:
+            self.n_requests += 1
+            png = self.frames.get(request)
+            if png is not None:
+                self.n_hits += 1
+                return png
+
+            pending = self.pending.get(request)
+            if pending is None:
+                if self.pool is not None:
+                    pending = self.pool.apply_async(render_worker_png, (request,))
+                else:
+                    pending = threading.Event()
+                self.pending[request] = pending
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            if self.pool is not None:
+                return pending.get()
+            pending.wait()
+            with self.lock:
+                png = self.frames.get(request)
+            # the frame may have failed or been evicted in the meantime
+            return png if png is not None else self.render(request)
+
+        try:
+            if self.pool is not None:
+                png = pending.get()
+            else:
+                with self.render_lock:
+                    png = render_worker_png(request)
+            with self.lock:
+                self.frames.put(request, png, len(png))
+        finally:
+            with self.lock:
+                self.pending.pop(request, None)
+            if self.pool is None:
+                pending.set()
+
+        return png
+
+    def to_stats(self):
+        '''
+        Describes the state of the server.
+        '''
+        with self.lock:
+            return {
+                'requests' : self.n_requests,
+                'hits' : self.n_hits,
+                'frames' : len(self.frames),
+                'cache_size' : self.frames.size,
+                'pending' : len(self.pending),
+                'workers' : self.workers,
+            }
+
+    def serve(self):
+        '''
+        Serves the frames until interrupted.
+        '''
+        httpd = ThreadingHTTPServer((self.host, self.port), RenderHandler)
+        httpd.render_server = self
+        print(f'Serving frames at \'http://{self.host}:{httpd.server_port}/frame?angle=0\'')
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.close()
+
+    def close(self):
+        '''
+        Stops the worker processes.
+        '''
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+        help='the address where to serve the frames')
+    parser.add_argument('--port', type=int, default=8000,
+        help='the port where to serve the frames')
+    parser.add_argument('--workers', type=int, default=2,
+        help='the number of processes rendering the frames (0 = rendered in the server process)')
+    parser.add_argument('--cache_size', type=int, default=256,
+        help='the size of the cache of the encoded frames, in MB')
+    parser.add_argument('--verbose', type=int, default=0,
+        help='if each request is logged (0 = not logged; 1 = logged)')
+
+    args = parser.parse_args()
+
+    from data import MapLoader
+    from animate import WorldAnimation
+
+    loader = MapLoader()
+    animation = WorldAnimation(
+        shapes=loader.to_shapes(),
+        airports=loader.to_airports(),
+        flights=loader.to_flights(),
+        params=PARAMS,
+    )
+
+    RenderServer(animation, args.host, args.port, args.workers, args.cache_size, bool(args.verbose)).serve()
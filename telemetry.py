@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import resource
+import threading
+
+
+# the methods of the animation timed as stages of the frames
+STAGES = [
+    'set_figure',
+    'plot_globe',
+    'plot_shade',
+    'plot_airports',
+    'plot_flights',
+    'plot_airplanes',
+    'savefig',
+    'to_image',
+    'render_cached_frame',
+    'render_cached_sizes',
+]
+
+
+# the methods of the animation making a whole frame, where the frames are sampled for profiling
+FRAMES = [
+    'make_frame',
+    'render_frame',
+    'render_sizes',
+]
+
+
+def to_rss():
+    '''
+    Returns the resident memory of the process, in bytes, or its peak if the current one is not available.
+    '''
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            return int(statm.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+
+class Telemetry(object):
+
+    def __init__(self, trace_file=None, profile_every=0, profile_file=None, live=True):
+        '''
+        The 'Telemetry' class records where the time goes when making an animation.
+        It times each stage of the frames, counts the frames done with the artists of the figure and the memory used,
+        and shows the frames per second and the remaining time while the animation is made.
+        The events are written in 'trace_file' at the end, in the Chrome trace format if it ends with '.json'
+        (to open in 'chrome://tracing' or Perfetto) and as JSON lines otherwise.
+        With 'profile_every', one frame out of 'profile_every' is profiled with cProfile and the statistics are
+        written in 'profile_file', or printed if there is none.
+        The stages are only timed in the process making the frames, the worker processes not being instrumented.
+        '''
+        self.trace_file = trace_file
+        self.profile_every = profile_every
+        self.profile_file = profile_file
+        self.live = live
+
+        self.events = [] # the timed stages and the frames done
+        self.lock = threading.Lock() # the frames can be done in another thread than the stages
+        self.profiler = cProfile.Profile() if profile_every > 0 else None
+        self.n_profiled = 0
+        self.n_calls = 0 # the number of frames started in this process
+        self.in_frame = False
+        self.n_frames = 0 # the number of frames expected
+        self.n_done = 0
+        self.start_time = None
+        self.last_time = None
+        self.last_print = 0
+        self.printing = False # if the progress is shown on the current line
+        self.animation = None
+
+    def to_time(self):
+        '''
+        Returns the time since the start of the animation, in seconds.
+        '''
+        return time.perf_counter() - self.start_time
+
+    def add_event(self, event):
+        '''
+        Adds an event, with the thread that recorded it.
+        '''
+        event['thread'] = threading.get_ident()
+        with self.lock:
+            self.events.append(event)
+
+    def timed(self, name, function):
+        '''
+        Wraps 'function' such that each of its calls is recorded as the stage 'name'.
+        '''
+        def timed_function(*args, **kwargs):
+            start = self.to_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add_event({'type' : 'stage', 'name' : name, 'start' : start, 'duration' : self.to_time() - start})
+
+        return timed_function
+
+    def counted(self, function):
+        '''
+        Wraps 'function' such that each of its calls is recorded as a frame done.
+        '''
+        def counted_function(*args, **kwargs):
+            result = function(*args, **kwargs)
+            self.frame_done()
+
+            return result
+
+        return counted_function
+
+    def sampled(self, function):
+        '''
+        Wraps 'function', which makes a whole frame, such that the sampled frames are profiled.
+        '''
+        def sampled_function(*args, **kwargs):
+            # a frame made by another method making a whole frame is only counted once
+            if self.in_frame:
+                return function(*args, **kwargs)
+
+            self.n_calls += 1
+            profiled = (self.profiler is not None) and ((self.n_calls - 1) % self.profile_every == 0)
+            self.in_frame = True
+            if profiled:
+                self.n_profiled += 1
+                self.profiler.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if profiled:
+                    self.profiler.disable()
+                self.in_frame = False
+
+        return sampled_function
+
+    def start(self, animation, n_frames):
+        '''
+        Starts recording the making of 'n_frames' frames by 'animation', by instrumenting its methods.
+        '''
+        self.animation = animation
+        self.n_frames = n_frames
+        self.start_time = time.perf_counter()
+        self.last_time = 0
+
+        for name in STAGES:
+            setattr(animation, name, self.timed(name, getattr(animation, name)))
+        for name in FRAMES:
+            setattr(animation, name, self.sampled(getattr(animation, name)))
+        animation.telemetry = self
+
+    def stop(self):
+        '''
+        Stops recording, restores the methods of the animation, and writes the trace and the profile.
+        '''
+        if self.animation is not None:
+            for name in STAGES + FRAMES:
+                self.animation.__dict__.pop(name, None)
+            self.animation.telemetry = None
+            self.animation = None
+
+        if self.printing:
+            print(file=sys.stderr)
+            self.printing = False
+        if self.trace_file:
+            self.save_trace()
+        if (self.profiler is not None) and self.n_profiled:
+            if self.profile_file:
+                self.profiler.dump_stats(self.profile_file)
+            else:
+                self.print_profile()
+
+    def frame_done(self, index=None):
+        '''
+        Records that a frame is done, with the artists of the figure and the memory used at that time.
+        '''
+        now = self.to_time()
+        artists = None
+        if (self.animation is not None) and hasattr(self.animation, 'ax'):
+            artists = len(self.animation.ax.get_children())
+
+        with self.lock:
+            start, self.last_time = self.last_time, now
+            self.n_done += 1
+            n_done = self.n_done
+        self.add_event({
+            'type' : 'frame',
+            'name' : 'frame',
+            'index' : n_done - 1 if index is None else index,
+            'start' : start,
+            'duration' : now - start,
+            'artists' : artists,
+            'rss' : to_rss(),
+        })
+
+        if self.live and ((now - self.last_print > 0.5) or (n_done == self.n_frames)):
+            self.last_print = now
+            self.printing = n_done < self.n_frames # the line is ended with the last frame
+            print(self.to_progress(n_done, now), end='\r' if self.printing else '\n', file=sys.stderr)
+
+    def to_progress(self, n_done, now):
+        '''
+        Describes the progress of the animation, with the frames per second and the estimated remaining time.
+        '''
+        fps = n_done/now if now > 0 else 0
+        eta = (self.n_frames - n_done)/fps if fps > 0 else 0
+        minutes, seconds = divmod(int(round(eta)), 60)
+        hours, minutes = divmod(minutes, 60)
+
+        return f'{n_done}/{self.n_frames} frames, {fps:.2f} frames/s, ETA {hours:d}:{minutes:02d}:{seconds:02d}'
+
+    def to_summary(self):
+        '''
+        Sums the time spent in each stage, the stages called by others being counted in both.
+        '''
+        summary = {}
+        for event in self.events:
+            if event['type'] == 'stage':
+                stage = summary.setdefault(event['name'], {'calls' : 0, 'seconds' : 0})
+                stage['calls'] += 1
+                stage['seconds'] += event['duration']
+
+        return summary
+
+    def save_trace(self):
+        '''
+        Writes the events in 'trace_file', in the Chrome trace format or as JSON lines.
+        '''
+        if self.trace_file.endswith('.json'):
+            pid = os.getpid()
+            trace = []
+            for event in self.events:
+                args = {key : value for key, value in event.items() if key not in ['type', 'name', 'start', 'duration', 'thread']}
+                trace.append({
+                    'name' : event['name'] if event['type'] == 'stage' else f'frame {event["index"]}',
+                    'cat' : event['type'],
+                    'ph' : 'X',
+                    'ts' : event['start']*1e6,
+                    'dur' : event['duration']*1e6,
+                    'pid' : pid,
+                    'tid' : event['thread'],
+                    'args' : args,
+                })
+                if event['type'] == 'frame':
+                    trace.append({
+                        'name' : 'memory',
+                        'ph' : 'C',
+                        'ts' : (event['start'] + event['duration'])*1e6,
+                        'pid' : pid,
+                        'args' : {'rss' : event['rss']},
+                    })
+            with open(self.trace_file, 'w') as trace_file:
+                json.dump({'traceEvents' : trace, 'displayTimeUnit' : 'ms'}, trace_file)
+
+        else:
+            with open(self.trace_file, 'w') as trace_file:
+                for event in self.events:
+                    trace_file.write(json.dumps(event) + '\n')
+                trace_file.write(json.dumps({'type' : 'summary', 'stages' : self.to_summary()}) + '\n')
+
+    def print_profile(self, n_lines=20):
+        '''
+        Prints the functions taking the most time in the profiled frames.
+        '''
+        if self.n_profiled:
+            pstats.Stats(self.profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(n_lines)
@@ -0,0 +1,61 @@
+import os.path as osp
+import cv2
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+
+from config import PARAMS
+from data import MapLoader
+from map import WorldMap
+
+
+ROOT = osp.dirname(osp.dirname(osp.abspath(__file__)))
+
+
+def load_shapes():
+    '''
+    Parses the land shapes of the repository, without the routes.
+    '''
+    loader = MapLoader.__new__(MapLoader) # the routes are not part of the repository
+    loader.data_folder = osp.join(ROOT, 'data')
+    loader.shapes_map = loader.__load__('ne_110m_land')
+    loader.__shapes__()
+
+    return [
+        loader.shape_coords[start:end]
+        for start, end in zip(loader.shape_offsets[:-1], loader.shape_offsets[1:])
+    ]
+
+
+def to_land(image):
+    '''
+    Returns the mask of the pixels of the land colour of a BGR image.
+    '''
+    return np.abs(image.astype(int) - [225, 105, 65]).max(axis=2) < 40 # 'royalblue' in BGR
+
+
+def test_land_matches_baseline(tmp_path):
+    '''
+    The land at angle 0, where Eurasia and its Caspian hole are cut by the horizon,
+    is the same as with the baseline rendering, apart from the anti-aliased coasts.
+    '''
+    assert PARAMS['globe']['land_colour'] == 'royalblue'
+
+    WorldMap(shapes=load_shapes()).plot('map', str(tmp_path), angle=0)
+    land = to_land(cv2.imread(str(tmp_path / 'map.png')))
+    reference = cv2.imread(osp.join(ROOT, 'tests', 'reference', 'land_000.png'), cv2.IMREAD_GRAYSCALE) > 0
+
+    assert land.shape == reference.shape
+    assert np.mean(land != reference) < 0.003
+
+
+def test_empty_map(tmp_path):
+    '''
+    A map and flights without any shape, airport or flight are built and drawn.
+    '''
+    from flights import WorldFlights
+
+    WorldMap().plot('map', str(tmp_path))
+    WorldFlights().plot('flights', str(tmp_path))
+
+    assert osp.exists(tmp_path / 'map.png') & osp.exists(tmp_path / 'flights.png')
@@ -0,0 +1,21 @@
+import cv2
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+
+from animate import WorldAnimation
+from server import MAX_SIZED, init_server_worker, render_worker_png
+from test_map import load_shapes
+
+
+def test_sizes_after_eviction():
+    '''
+    A size rendered again after its copy of the animation was dropped is drawn on a new figure,
+    and not from the static layers cached for the figure that was dropped.
+    '''
+    init_server_worker(WorldAnimation(shapes=load_shapes()))
+
+    sizes = [100 + 10*index for index in range(MAX_SIZED + 1)] + [100]
+    for size in sizes:
+        image = cv2.imdecode(np.frombuffer(render_worker_png((0., 0, '', True, True, True, size)), np.uint8), 1)
+        assert image.shape == (size, size, 3)